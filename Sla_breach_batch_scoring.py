@@ -0,0 +1,111 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from features.handletimeseriesdata import resolve_as_of
+from serving.scoring_service import SLABreachScorer
+from utils.artifacts import BEST_MODEL_PATH
+
+OPEN_TICKETS_PATH = "data/raw/open_tickets.csv"
+SCORES_PATH = "data/processed/sla_breach_scores.parquet"
+
+_scorer = None  # per-worker SLABreachScorer, set by _init_worker
+_thread_limits = None  # per-worker threadpoolctl limit, held for the worker's lifetime
+
+
+def _init_worker(model_path, threshold, registry_dir=None, as_of=None):
+    global _scorer, _thread_limits
+    from threadpoolctl import threadpool_limits
+
+    # mmap_mode='r': workers share the model's arrays through the page cache instead of each unpickling a copy
+    _scorer = SLABreachScorer.from_artifacts(model_path=model_path, mmap_mode='r', registry_dir=registry_dir)
+    _scorer.threshold = threshold
+    _scorer.as_of = as_of
+    # parallelism comes from the pool; avoid nested thread pools (BLAS / OpenMP and every n_jobs,
+    # including a Pipeline's `model__n_jobs`)
+    _thread_limits = threadpool_limits(1)
+    params = _scorer.model.get_params()
+    _scorer.model.set_params(**{key: 1 for key in params if key.endswith('n_jobs')})
+
+
+def _score_chunk(chunk: pd.DataFrame, id_col=None) -> pd.DataFrame:
+    probabilities = _scorer.score_batch(chunk)
+    ids = chunk[id_col].to_numpy() if id_col else chunk.index.to_numpy()
+    return pd.DataFrame({
+        id_col or 'row': ids,
+        'breach_probability': probabilities.astype('float32'),
+        'sla_breach': probabilities >= _scorer.threshold,
+    })
+
+
+def batch_score(input_path=OPEN_TICKETS_PATH, output_path=SCORES_PATH, model_path=BEST_MODEL_PATH,
+                chunksize=50_000, n_workers=None, id_col='Ticket ID', threshold=0.5, registry_dir=None,
+                as_of=None):
+    """
+    Score a ticket export chunk by chunk across a process pool and stream the
+    probabilities to Parquet. Chunks are read lazily and written in input order;
+    at most about 2 * n_workers chunks are in flight at once. With registry_dir,
+    the registry's champion is scored instead of model_path. Every chunk is
+    featurized at the same `as_of` (default: the start of the run).
+    """
+    n_workers = n_workers or os.cpu_count()
+    as_of = resolve_as_of(as_of)
+    print(f"\n Batch scoring {input_path} with {n_workers} workers (chunks of {chunksize})...")
+    start = time.perf_counter()
+    writer, rows = None, 0
+
+    header = pd.read_csv(input_path, nrows=0).columns
+    id_col = id_col if id_col in header else None
+    chunks = pd.read_csv(input_path, chunksize=chunksize)
+
+    with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(model_path, threshold, registry_dir, as_of)) as pool:
+        pending = []
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(_score_chunk, chunk, id_col))
+                if len(pending) < 2 * n_workers:
+                    continue
+                writer, rows = _write(pending.pop(0).result(), output_path, writer, rows, start)
+            while pending:
+                writer, rows = _write(pending.pop(0).result(), output_path, writer, rows, start)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f" Scores written to {output_path} ({rows} rows in {elapsed:.1f}s, "
+          f"{rows / max(elapsed, 1e-9):.0f} rows/sec)")
+    return output_path
+
+
+def _write(scores, output_path, writer, rows, start):
+    table = pa.Table.from_pandas(scores, preserve_index=False)
+    if writer is None:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        writer = pq.ParquetWriter(output_path, table.schema)
+    writer.write_table(table)
+    rows += len(scores)
+    print(f" {rows} rows scored ({rows / max(time.perf_counter() - start, 1e-9):.0f} rows/sec)")
+    return writer, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score open tickets for SLA breach risk")
+    parser.add_argument('--input', default=OPEN_TICKETS_PATH)
+    parser.add_argument('--output', default=SCORES_PATH)
+    parser.add_argument('--model-path', default=BEST_MODEL_PATH)
+    parser.add_argument('--chunksize', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--id-col', default='Ticket ID')
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--registry', default=None, help="registry directory; score with its champion model")
+    parser.add_argument('--as-of', default=None, help="reference time of time-dependent features (default: now)")
+    args = parser.parse_args()
+
+    batch_score(args.input, args.output, args.model_path, args.chunksize, args.workers, args.id_col,
+                args.threshold, args.registry, args.as_of)
@@ -0,0 +1,230 @@
+"""
+SLA breach pipeline command line.
+
+    python Sla_breach_cli.py features [--stage-cache] [--resume-from STAGE] [--incremental] [--as-of TIME]
+                                      [--config PATH]
+    python Sla_breach_cli.py train    [--model-type xgb] [--search halving]
+    python Sla_breach_cli.py evaluate [--registry DIR]
+    python Sla_breach_cli.py score    [--input CSV] [--serve]
+    python Sla_breach_cli.py dag      [--targets STAGE ...] [--no-resume]
+
+Only argparse is imported up front; pandas, sklearn, xgboost, imblearn and
+mlflow are imported inside the subcommand that needs them, so `--help` and
+scoring-only runs do not pay for the training stack.
+
+--as-of pins the reference time of ticket ages and the year-start anchor
+(default: now when scoring, today at midnight for feature runs), so a run can
+be reproduced or backfilled.
+
+`features` (in memory or --streaming) and `dag` build business-day features
+with the same calendar: the config's `time_series` section (holidays,
+region_col, weekmask, business_hours, as_of).
+"""
+import argparse
+import logging
+import sys
+import warnings
+
+from utils.artifacts import BEST_MODEL_PATH, CANDIDATE_MODEL_PATH
+
+HOLDOUT_CHECKPOINT = 'holdout'  # held-out (X_test, y_test) written by `train`, read by `evaluate`
+
+
+def _tracker(args, run_name):
+    from contextlib import nullcontext
+
+    if not args.track:
+        return nullcontext()
+    from utils.tracking import AsyncRunLogger
+    return AsyncRunLogger(run_name=run_name)
+
+
+def _time_series_options(config_path):
+    """The config's `time_series` section, which `dag` stages receive through params_from."""
+    from pathlib import Path
+    from utils.confighandler import ConfigReader
+
+    if not Path(config_path).exists():
+        logging.getLogger(__name__).warning(f"No config at {config_path}; using the default business calendar.")
+        return {}
+    return dict(ConfigReader(Path(config_path)).get_section('time_series') or {})
+
+
+def cmd_features(args):
+    from Sla_breach_training_pipeline import (
+        full_feature_pipeline, incremental_feature_refresh, streaming_feature_pipeline,
+    )
+    from utils.checkpoint import CheckpointStore
+    from utils.stage_cache import StageCache
+
+    if args.incremental:
+        # changed rows are rebuilt with the calendar saved by the last full run
+        incremental_feature_refresh(compact=args.compact, as_of=args.as_of)
+        return
+    time_series_options = _time_series_options(args.config)
+    config_as_of = time_series_options.pop('as_of', None)
+    as_of = args.as_of or config_as_of
+    if args.streaming:
+        streaming_feature_pipeline(args.output, chunksize=args.chunksize, as_of=as_of, **time_series_options)
+        return
+    with _tracker(args, 'features') as tracker:
+        full_feature_pipeline(checkpoints=CheckpointStore(), checkpoint_stages=args.checkpoint_stages,
+                              resume_from=args.resume_from,
+                              stage_cache=StageCache() if args.stage_cache else None,
+                              stage_params={'time_series': time_series_options}, tracker=tracker, as_of=as_of)
+
+
+def cmd_train(args):
+    import joblib
+    from Sla_breach_training_pipeline import split_train_test, train_model
+    from utils.checkpoint import CheckpointStore
+
+    checkpoints = CheckpointStore()
+    if args.feature_store:
+        from features.feature_store import IncrementalFeatureStore
+        features = IncrementalFeatureStore().load(as_of=args.as_of)
+    else:
+        features = checkpoints.load('encoding')
+    X_train, X_test, y_train, y_test = split_train_test(features, args.test_size, args.random_state)
+    # SMOTE runs inside each CV fold's fit, never on the held-out rows
+    with _tracker(args, f'train-{args.model_type}') as tracker:
+        model = train_model(X_train, y_train, args.model_type, args.search, args.smote, args.random_state,
+                            tracker=tracker)
+
+    joblib.dump(model, args.output)
+    checkpoints.save(HOLDOUT_CHECKPOINT, (X_test, y_test))
+    print(f" Candidate model saved to {args.output}")
+
+
+def cmd_evaluate(args):
+    import joblib
+    from evaluation.model_evaluation.evaluation import evaluate_and_save_best_model
+    from utils.checkpoint import CheckpointStore
+
+    X_test, y_test = CheckpointStore().load(HOLDOUT_CHECKPOINT)
+    registry = None
+    if args.registry:
+        from models.model_registry import ModelRegistry
+        registry = ModelRegistry(args.registry)
+    best_score, saved = evaluate_and_save_best_model(
+        joblib.load(args.model_path), X_test, y_test, args.best_model_path, metric=args.metric,
+        threshold=args.threshold, n_bootstrap=args.n_bootstrap, registry=registry,
+    )
+    print(f" Best {args.metric}: {best_score:.4f} ({'saved' if saved else 'not saved'})")
+
+
+def cmd_score(args):
+    if args.serve:
+        from serving.scoring_service import SLABreachScorer, ScoringService, serve
+
+        scorer = SLABreachScorer.from_artifacts(model_path=args.model_path, registry_dir=args.registry,
+                                                as_of=args.as_of)
+        serve(ScoringService(scorer, threshold=args.threshold), host=args.host, port=args.port)
+        return
+    from Sla_breach_batch_scoring import batch_score
+
+    options = {'input_path': args.input, 'output_path': args.output, 'chunksize': args.chunksize,
+               'n_workers': args.workers, 'as_of': args.as_of}
+    batch_score(model_path=args.model_path, threshold=args.threshold, registry_dir=args.registry,
+                **{key: value for key, value in options.items() if value is not None})
+
+
+def cmd_dag(args):
+    from utils.dag_executor import DAGExecutor
+
+    overrides = {'max_workers': args.workers} if args.workers else {}
+    from features.handletimeseriesdata import pipeline_as_of
+
+    executor = DAGExecutor.from_config(args.config, **overrides)
+    # resolve as_of before fingerprinting, so `as_of: null` means today's run (as in `features`),
+    # not whichever day the checkpoints were first built
+    for spec in executor.stages.values():
+        if 'as_of' in spec['params']:
+            spec['params']['as_of'] = pipeline_as_of(args.as_of or spec['params']['as_of'])
+    with _tracker(args, 'dag') as tracker:
+        executor.run(targets=args.targets, resume=not args.no_resume, tracker=tracker)
+
+
+def build_parser():
+    # stage names are repeated here rather than imported: utils.checkpoint pulls in pandas / pyarrow
+    stages = ['null_handling', 'memory_optimization', 'time_series', 'encoding', 'leak_removal']
+
+    parser = argparse.ArgumentParser(description="SLA breach prediction pipeline")
+    parser.add_argument('--log-level', default='INFO')
+    parser.add_argument('--show-warnings', action='store_true', help="do not silence library warnings")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    features = commands.add_parser('features', help="run the feature pipeline and checkpoint its outputs")
+    features.add_argument('--resume-from', choices=stages, default=None)
+    features.add_argument('--checkpoint-stages', nargs='+', choices=stages, default=['encoding', 'leak_removal'])
+    features.add_argument('--stage-cache', action='store_true', help="reuse unchanged stage outputs from disk")
+    features.add_argument('--streaming', action='store_true', help="out-of-core pipeline writing Parquet")
+    features.add_argument('--output', default="data/processed/streamed_features.parquet")
+    features.add_argument('--chunksize', type=int, default=100_000)
+    features.add_argument('--incremental', action='store_true',
+                          help="only recompute new / updated tickets into the feature store")
+    features.add_argument('--compact', action='store_true', help="with --incremental, merge store parts")
+    features.add_argument('--as-of', default=None,
+                          help="reference time of time-dependent features (default: the config's, else today)")
+    features.add_argument('--config', default="config/config.yaml",
+                          help="config whose `time_series` section sets the business calendar")
+    features.add_argument('--track', action='store_true', help="log the run to MLflow")
+    features.set_defaults(handler=cmd_features)
+
+    train = commands.add_parser('train', help="tune and fit a model on the encoded features")
+    train.add_argument('--model-type', choices=['rf', 'xgb'], default='xgb')
+    train.add_argument('--search', choices=['halving', 'grid'], default='halving')
+    train.add_argument('--smote', choices=['exact', 'approximate', 'none'], default='exact')
+    train.add_argument('--feature-store', action='store_true',
+                       help="train on the incremental feature store instead of the encoding checkpoint")
+    train.add_argument('--as-of', default=None, help="with --feature-store, age stored rows to this time")
+    train.add_argument('--test-size', type=float, default=0.2)
+    train.add_argument('--random-state', type=int, default=42)
+    train.add_argument('--output', default=CANDIDATE_MODEL_PATH)
+    train.add_argument('--track', action='store_true', help="log the run to MLflow")
+    train.set_defaults(handler=cmd_train)
+
+    evaluate = commands.add_parser('evaluate', help="evaluate the candidate on the held-out split")
+    evaluate.add_argument('--model-path', default=CANDIDATE_MODEL_PATH)
+    evaluate.add_argument('--best-model-path', default=BEST_MODEL_PATH)
+    evaluate.add_argument('--metric', choices=['roc_auc', 'pr_auc', 'f1', 'accuracy'], default='roc_auc')
+    evaluate.add_argument('--threshold', type=float, default=0.5)
+    evaluate.add_argument('--n-bootstrap', type=int, default=1000)
+    evaluate.add_argument('--registry', default=None, help="registry directory to register / promote in")
+    evaluate.set_defaults(handler=cmd_evaluate)
+
+    score = commands.add_parser('score', help="batch-score a ticket export, or serve scores over HTTP")
+    score.add_argument('--input', default=None)
+    score.add_argument('--output', default=None)
+    score.add_argument('--model-path', default=BEST_MODEL_PATH)
+    score.add_argument('--registry', default=None, help="registry directory; score with its champion")
+    score.add_argument('--threshold', type=float, default=0.5)
+    score.add_argument('--chunksize', type=int, default=None)
+    score.add_argument('--workers', type=int, default=None)
+    score.add_argument('--as-of', default=None, help="reference time of time-dependent features (default: now)")
+    score.add_argument('--serve', action='store_true')
+    score.add_argument('--host', default='127.0.0.1')
+    score.add_argument('--port', type=int, default=8080)
+    score.set_defaults(handler=cmd_score)
+
+    dag = commands.add_parser('dag', help="run the stage DAG declared in the config's `pipeline` section")
+    dag.add_argument('--config', default="config/config.yaml")
+    dag.add_argument('--targets', nargs='+', default=None, help="stages to run (default: all)")
+    dag.add_argument('--workers', type=int, default=None, help="concurrent stages (default: config / CPUs)")
+    dag.add_argument('--no-resume', action='store_true', help="recompute stages completed by an earlier run")
+    dag.add_argument('--as-of', default=None, help="override the config's time_series as_of")
+    dag.add_argument('--track', action='store_true', help="log the run to MLflow")
+    dag.set_defaults(handler=cmd_dag)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s - %(levelname)s - %(message)s")
+    if not args.show_warnings:
+        warnings.filterwarnings('ignore')
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
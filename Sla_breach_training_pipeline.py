@@ -1,52 +1,87 @@
+import logging
+import warnings
+from contextlib import nullcontext
+
 import pandas as pd
 from features.Missing_null_pipeline import DataProcessor
-from features.handletimeseriesdata import TimeSeriesProcessor
-from features.Encodingfeatures import FeatureEncoder
-from features.leakageandsmote import SMOTEHandler,LeakyFeatureRemover
-from models.Modeltraining_sla_breach import ModelTrainer
-from evaluation.model_evaluation.evaluation import evaluate_and_save_best_model
+from features.memory_optimizer import MemoryOptimizer
+from features.handletimeseriesdata import TimeSeriesProcessor, pipeline_as_of
+from features.Encodingfeatures import FeatureEncoder, prepare_native_categorical
+from features.feature_store import FEATURE_STORE_DIR, IncrementalFeatureStore
+from utils.columnar_cache import read_csv_cached
+from utils.checkpoint import CheckpointStore, PIPELINE_STAGES
+from utils.stage_cache import StageCache, hash_frame
+from utils.tracking import AsyncRunLogger
+from utils.datetime_formats import save_datetime_formats
+from utils.artifacts import (
+    DATETIME_FORMATS_PATH, NULL_HANDLER_PATH, VOCABULARY_PATH, FEATURE_NAMES_PATH, BEST_MODEL_PATH,
+    TIME_SERIES_OPTIONS_PATH, save_feature_names, save_time_series_options,
+)
+
+RAW_DATA_PATH = "data/raw/itsm_sla_tickets_dataset_extended.csv"
 
 def run_null_handling(df: pd.DataFrame) -> pd.DataFrame:
     print("\n🧹 Running Null Handling...")
-    processor = DataProcessor(df)
-    processor.remove_high_null_columns()
-    processor.handle_missing_values()
+    processor = DataProcessor(threshold=70)
+    df_cleaned = processor.fit_transform(df)
+    processor.save(NULL_HANDLER_PATH)
 
-    total_null_values = processor.df_cleaned.isnull().sum().sum()
+    total_null_values = df_cleaned.isnull().sum().sum()
     print(" Cleaned DataFrame Preview:")
-    print(processor.df_cleaned.head())
+    print(df_cleaned.head())
     print(f" Total remaining null values: {total_null_values}")
 
-    return processor.df_cleaned
+    return df_cleaned
+
+
+def run_memory_optimization(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast the cleaned frame (category strings, narrow ints, float32) before feature engineering."""
+    print("\n Running Memory Optimization...")
+    return MemoryOptimizer(verbose=True).optimize(df)
 
 
-def run_time_series_processing(df: pd.DataFrame) -> pd.DataFrame:
+def run_time_series_processing(df: pd.DataFrame, as_of=None, **calendar_options) -> pd.DataFrame:
+    """
+    as_of: reference time for ticket ages and the year-start anchor (None: today at midnight).
+    calendar_options: holidays / region_col / weekmask / business_hours for TimeSeriesProcessor.
+    """
     print("\n⏱ Running Time Series Feature Engineering...")
     print(f" Input DataFrame shape: {df.shape}")
     
-    processor = TimeSeriesProcessor(df, reference_date_col='created_date')
+    processor = TimeSeriesProcessor(df, reference_date_col='created_date', as_of=pipeline_as_of(as_of),
+                                    **calendar_options)
     df_processed = processor.process()
+    # the derived business/ITSM features come out as float64; shrink them the same way
+    df_processed = MemoryOptimizer(verbose=False).optimize(df_processed)
+    save_datetime_formats(processor.datetime_formats, DATETIME_FORMATS_PATH)
+    save_time_series_options(processor.calendar_options(), TIME_SERIES_OPTIONS_PATH)
 
     print(f" Time Series Feature Engineering Complete. Shape: {df_processed.shape}")
     return df_processed
 
 
-def run_feature_encoding(df: pd.DataFrame) -> pd.DataFrame:
+def run_feature_encoding(df: pd.DataFrame, sparse: bool = False):
+    """sparse=True returns a SparseFeatureFrame (CSR one-hot + numeric block) instead of a DataFrame."""
     print("\nRunning Feature Encoding...")
     print(f"DataFrame shape before encoding: {df.shape}")
     
-    encoder = FeatureEncoder(df, target_col='SLA Breach', verbose=True)
+    encoder = FeatureEncoder(df, target_col='SLA Breach', verbose=True, sparse=sparse)
     df_encoded, encoding_strategy_df, encoders = encoder.encode()
+    encoder.save_vocabularies(VOCABULARY_PATH)
 
     print(f"Encoding complete. Shape: {df_encoded.shape}")
     return df_encoded
 
 
 def run_leak_removal_and_smote(df: pd.DataFrame):
+    # sklearn / imblearn are only imported once a run actually reaches this stage
+    from features.leakageandsmote import SMOTEHandler, LeakyFeatureRemover
+
     print("\n Running Leaky Feature Removal + SMOTE...")
     
     remover = LeakyFeatureRemover(target_col='SLA Breach', verbose=True)
     X, y = remover.fit_transform(df)
+    save_feature_names(remover.feature_names_, FEATURE_NAMES_PATH)
 
     print(f" After leak removal -> Features: {X.shape}, Target: {y.shape}")
 
@@ -57,31 +92,188 @@ def run_leak_removal_and_smote(df: pd.DataFrame):
     return X_resampled, y_resampled
 
 
-def full_feature_pipeline():
+def stage_code(name):
+    """Code that determines a stage's output; part of the stage cache key."""
+    if name == 'leak_removal':
+        from features.leakageandsmote import SMOTEHandler, LeakyFeatureRemover
+        return run_leak_removal_and_smote, LeakyFeatureRemover, SMOTEHandler
+    return {
+        'null_handling': (run_null_handling, DataProcessor),
+        'memory_optimization': (run_memory_optimization, MemoryOptimizer),
+        'time_series': (run_time_series_processing, TimeSeriesProcessor, MemoryOptimizer),
+        'encoding': (run_feature_encoding, FeatureEncoder),
+    }[name]
+
+
+# artifacts each stage writes besides its output; the stage cache snapshots and restores them
+STAGE_ARTIFACTS = {
+    'null_handling': [NULL_HANDLER_PATH],
+    'time_series': [DATETIME_FORMATS_PATH, TIME_SERIES_OPTIONS_PATH],
+    'encoding': [VOCABULARY_PATH],
+    'leak_removal': [FEATURE_NAMES_PATH],
+}
+
+
+def full_feature_pipeline(checkpoints: CheckpointStore = None, checkpoint_stages=None, resume_from=None,
+                          stage_cache: StageCache = None, stage_params=None, tracker: AsyncRunLogger = None,
+                          as_of=None):
+    """
+    Run the feature pipeline in memory, handing each stage's frame directly to the next.
+
+    checkpoints:        optional CheckpointStore; when given, outputs of `checkpoint_stages`
+                        (default: every stage) are written as Feather files.
+    resume_from:        stage name whose checkpoint is loaded instead of recomputing it
+                        and every stage before it.
+    stage_cache:        optional StageCache; stages whose input frame, parameters and code are
+                        unchanged are served from disk instead of being recomputed.
+    stage_params:       optional dict of stage name -> keyword arguments for that stage,
+                        e.g. {'time_series': {'holidays': [...], 'business_hours': (8, 18)}}.
+    tracker:            optional started AsyncRunLogger; the input dataset hash, stage parameters,
+                        per-stage timings and memory use are queued to its MLflow run.
+    as_of:              reference time of the time-dependent features (default: today at
+                        midnight, see pipeline_as_of). It is passed to the time_series stage
+                        and is part of its cache key, so same-day runs hit the cache; pin it to
+                        reproduce or backfill a run.
+    """
     print("\n Starting In-Memory Feature Engineering Pipeline...")
 
-    # Step 1: Load raw data from config
-    df = pd.read_csv("data/raw/itsm_sla_tickets_dataset_extended.csv")
+    if checkpoint_stages is None:
+        checkpoint_stages = PIPELINE_STAGES
+    stage_params = dict(stage_params or {})
+    time_series_params = dict(stage_params.get('time_series', {}))
+    time_series_params['as_of'] = pipeline_as_of(as_of if as_of is not None else time_series_params.get('as_of'))
+    stage_params['time_series'] = time_series_params
+    if resume_from is not None:
+        if checkpoints is None:
+            raise ValueError("resume_from requires a CheckpointStore.")
+        if resume_from not in PIPELINE_STAGES:
+            raise ValueError(f"Unknown stage '{resume_from}'. Expected one of {PIPELINE_STAGES}")
+    start = PIPELINE_STAGES.index(resume_from) + 1 if resume_from else 0
+
+    stages = [
+        ('null_handling', run_null_handling),        # Step 2: Null handling
+        ('memory_optimization', run_memory_optimization),  # Step 2b: dtype downcasting
+        ('time_series', run_time_series_processing),  # Step 3: Time series feature engineering
+        ('encoding', run_feature_encoding),           # Step 4: Encoding
+        ('leak_removal', run_leak_removal_and_smote), # Step 5: Leak removal + SMOTE
+    ]
+
+    if resume_from:
+        output = checkpoints.load(resume_from)
+    else:
+        # Step 1: Load raw data (typed columnar cache, re-parsed only when the CSV changes)
+        output = read_csv_cached(RAW_DATA_PATH)
+
+    if tracker is not None:
+        tracker.log_param('source', f'checkpoint:{resume_from}' if resume_from else RAW_DATA_PATH)
+        if not isinstance(output, tuple):
+            tracker.log_params({'input_rows': len(output), 'dataset_hash': hash_frame(output)})
+        tracker.log_params(stage_params, prefix='stage_params.')
+
+    for name, stage in stages[start:]:
+        params = stage_params.get(name, {})
+        with tracker.stage(name) if tracker is not None else nullcontext():
+            if stage_cache is not None:
+                output = stage_cache.run(name, stage, output, params=params, code=stage_code(name),
+                                         artifacts=STAGE_ARTIFACTS.get(name, ()))
+            else:
+                output = stage(output, **params)
+        if checkpoints is not None and name in checkpoint_stages:
+            checkpoints.save(name, output)
+
+    X_final, y_final = output
+    print("\n Feature Pipeline Completed Successfully!")
+    return X_final, y_final
 
-    # Step 2: Null handling
-    df_clean = run_null_handling(df)
+def native_categorical_feature_pipeline(as_of=None):
+    """
+    Feature pipeline for XGBoost with enable_categorical: null handling, dtype
+    downcasting and time-series features, then string columns as pandas
+    `category` instead of the encoding stage. No SMOTE (it cannot interpolate
+    categories); weight the minority class with scale_pos_weight instead.
+    """
+    from features.leakageandsmote import LeakyFeatureRemover
 
-    # Step 3: Time series feature engineering
-    df_time_features = run_time_series_processing(df_clean)
+    print("\n Starting Native-Categorical Feature Pipeline...")
+    df = read_csv_cached(RAW_DATA_PATH)
+    df = run_time_series_processing(run_memory_optimization(run_null_handling(df)), as_of=as_of)
+    df = prepare_native_categorical(df, target_col='SLA Breach')
 
-    # Step 4: Encoding
-    df_encoded = run_feature_encoding(df_time_features)
-    
-    df_encoded.to_csv("data/processed/encoded_data.csv", index=False)
-    
-    df_encoded = pd.read_csv("data/processed/encoded_data.csv")
-    
+    remover = LeakyFeatureRemover(target_col='SLA Breach', verbose=True)
+    X, y = remover.fit_transform(df)
+    print(f" Native-categorical features: {X.shape}, "
+          f"{len(X.select_dtypes(include='category').columns)} category columns")
+    return X, y
+
+def streaming_feature_pipeline(output_path="data/processed/streamed_features.parquet", chunksize=100_000,
+                               as_of=None, **time_series_options):
+    """
+    Out-of-core variant of full_feature_pipeline: two chunked passes over the raw
+    export, writing leak-free features + target to Parquet without SMOTE.
+    """
+    from features.streaming_pipeline import StreamingFeaturePipeline
+
+    print("\n Starting Streaming Feature Engineering Pipeline...")
+    pipeline = StreamingFeaturePipeline(target_col='SLA Breach', chunksize=chunksize,
+                                        as_of=pipeline_as_of(as_of), **time_series_options)
+    pipeline.run(RAW_DATA_PATH, output_path)
+    print("\n Streaming Feature Pipeline Completed Successfully!")
+    return output_path
+
+def incremental_feature_refresh(path=RAW_DATA_PATH, store_dir=FEATURE_STORE_DIR, compact=False, as_of=None):
+    """
+    Daily refresh: recompute features only for tickets that are new or whose
+    last-updated time changed, using the artifacts of the last full run, and
+    merge them into the persisted feature store. Changed rows are computed at
+    `as_of` (default: now); unchanged ones are re-aged to it when the store is read.
+    """
+    print("\n Starting Incremental Feature Refresh...")
+    store = IncrementalFeatureStore(store_dir)
+    store.refresh(read_csv_cached(path), as_of=as_of)
+    if compact:
+        store.compact()
+    return store
+
+
+# --- DAG stages (see the `pipeline` section of config/config.yaml and utils/dag_executor.py)
+
+def load_raw_data(path=RAW_DATA_PATH) -> pd.DataFrame:
+    return read_csv_cached(path)
+
+
+def split_train_test(df: pd.DataFrame, test_size=0.2, random_state=42):
+    """Leak-free features split into (X_train, X_test, y_train, y_test), stratified on the target."""
+    from sklearn.model_selection import train_test_split
+    from features.leakageandsmote import LeakyFeatureRemover
+
+    remover = LeakyFeatureRemover(target_col='SLA Breach', verbose=False)
+    X, y = remover.fit_transform(df)
+    save_feature_names(remover.feature_names_, FEATURE_NAMES_PATH)
+    return tuple(train_test_split(X, y, test_size=test_size, stratify=y, random_state=random_state))
 
-    # Step 5: Leak removal + SMOTE
-    X_final, y_final = run_leak_removal_and_smote(df_encoded)
 
-    print("\n Feature Pipeline Completed Successfully!")
-    return X_final, y_final
+def train_model(X_train, y_train, model_type='xgb', search='halving', smote='exact', random_state=42,
+                tracker=None, **search_options):
+    """Tune and fit one model family; smote='exact'/'approximate' resamples inside each CV fold, 'none' skips it."""
+    from features.leakageandsmote import SMOTEHandler
+    from models.Modeltraining_sla_breach import ModelTrainer
+
+    sampler = None if smote == 'none' else SMOTEHandler(random_state, verbose=False, engine=smote)
+    trainer = ModelTrainer(model_type, random_state=random_state, sampler=sampler, tracker=tracker)
+    return trainer.train(X_train, y_train, search=search, **search_options)
+
+
+def select_best_model(X_test, y_test, *models, metric='roc_auc', n_bootstrap=1000, model_save_path=BEST_MODEL_PATH):
+    """Evaluate each candidate on the held-out split; the best one is saved to model_save_path and returned."""
+    from evaluation.model_evaluation.evaluation import evaluate_and_save_best_model
+
+    best_score, best_model = None, None
+    for model in models:
+        best_score, saved = evaluate_and_save_best_model(model, X_test, y_test, model_save_path, best_score,
+                                                         metric=metric, n_bootstrap=n_bootstrap)
+        if saved:
+            best_model = model
+    return best_model
 
 
 
@@ -116,6 +308,8 @@ def full_feature_pipeline():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    warnings.filterwarnings('ignore')
     try:
         X, y = full_feature_pipeline()
     except Exception as e:
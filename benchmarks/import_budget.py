@@ -0,0 +1,70 @@
+"""
+Cold import-time budgets of the entry points. tests/test_import_budget.py
+enforces them on every pytest run; this script only prints the report:
+
+    python -m benchmarks.import_budget [--repeats 3] [--scale 2]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('sklearn', 'xgboost', 'imblearn', 'mlflow')
+
+# module -> (cold import budget in seconds, modules it must not import)
+IMPORT_BUDGETS = {
+    'Sla_breach_cli': (0.3, HEAVY_MODULES + ('pandas', 'numpy')),
+    'Sla_breach_training_pipeline': (1.0, HEAVY_MODULES),
+    'Sla_breach_batch_scoring': (1.0, HEAVY_MODULES),
+    'serving.scoring_service': (1.0, HEAVY_MODULES),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module, forbidden=(), repeats=3):
+    """Best-of-`repeats` import time of `module` in a fresh interpreter, and any forbidden modules it loaded."""
+    best = None
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, forbidden=tuple(forbidden))],
+                             cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def check_import_budgets(budgets=IMPORT_BUDGETS, repeats=3, scale=1.0) -> pd.DataFrame:
+    """
+    Cold-start guard: one row per module with its import time against the budget
+    (times `scale`, for slower machines) and the heavy dependencies it pulled in.
+    `ok` is False when either the budget is exceeded or a forbidden module loaded.
+    """
+    rows = []
+    for module, (budget, forbidden) in budgets.items():
+        result = measure_import(module, forbidden, repeats)
+        rows.append({'module': module, 'seconds': result['seconds'], 'budget': budget * scale,
+                     'forbidden_loaded': ','.join(result['loaded']),
+                     'ok': result['seconds'] <= budget * scale and not result['loaded']})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check cold import times against their budgets")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every budget (e.g. 2 on slow CI)")
+    args = parser.parse_args()
+
+    report = check_import_budgets(repeats=args.repeats, scale=args.scale)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    sys.exit(0 if report['ok'].all() else 1)
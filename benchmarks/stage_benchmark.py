@@ -0,0 +1,234 @@
+"""
+Per-stage time / memory benchmark of the SLA breach pipeline on synthetic tickets.
+
+Run from the repository root:
+
+    python -m benchmarks.stage_benchmark --sizes 10000 100000
+    python -m benchmarks.stage_benchmark --compare-only
+
+(`python benchmarks/stage_benchmark.py ...` works too.) Exits with status 1 when
+a stage regressed against the baseline run.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# run as a script, Python puts benchmarks/ rather than the repository root on sys.path
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from data_ingestion.synthetic_tickets import generate_tickets
+from features.Missing_null_pipeline import DataProcessor
+from features.handletimeseriesdata import TimeSeriesProcessor
+from features.Encodingfeatures import FeatureEncoder
+from features.leakageandsmote import LeakyFeatureRemover, SMOTEHandler
+from models.Modeltraining_sla_breach import ModelTrainer
+from evaluation.model_evaluation.evaluation import evaluate_probabilities
+from utils.tracking import peak_rss_mb
+
+BENCHMARK_HISTORY_PATH = "benchmarks/results/stage_benchmarks.jsonl"
+
+
+def _measure(fn, *args):
+    """(result, wall seconds, peak traced MB) of fn(*args)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn(*args)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def _n_rows(output):
+    """Rows of a stage's input frame, or of the first array-like in a tuple of them."""
+    items = output if isinstance(output, (tuple, list)) else [output]
+    return next((int(item.shape[0]) for item in items if hasattr(item, 'shape')), None)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment():
+    import sklearn
+    import xgboost
+    return {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'sklearn': sklearn.__version__, 'xgboost': xgboost.__version__, 'cpus': os.cpu_count(),
+            'machine': platform.machine()}
+
+
+class StageBenchmark:
+    """
+    Times and memory-profiles each pipeline stage on synthetic tickets.
+
+    For every size, a seeded synthetic export runs through DataProcessor,
+    TimeSeriesProcessor, FeatureEncoder, LeakyFeatureRemover, SMOTEHandler (on the
+    training split), one fixed ModelTrainer model and evaluate_probabilities, each
+    stage feeding the next. Every stage records wall time and peak traced memory
+    (tracemalloc, as in SMOTEHandler.benchmark; timings include its overhead, so
+    compare runs made with this suite only). Results are appended to a JSON-lines
+    history together with the git commit and library versions, and compare()
+    flags stages that got slower or hungrier than a baseline run.
+    """
+    def __init__(self, sizes=(10_000, 100_000), seed=42, model_type='xgb', smote_engine='exact',
+                 n_bootstrap=200, repeats=1, history_path=BENCHMARK_HISTORY_PATH, verbose=True):
+        self.sizes = sizes
+        self.seed = seed
+        self.model_type = model_type
+        self.smote_engine = smote_engine
+        self.n_bootstrap = n_bootstrap
+        self.repeats = repeats
+        self.history_path = history_path
+        self.verbose = verbose
+        self.results_ = pd.DataFrame()
+
+    def _stages(self):
+        """(name, fn) pairs; each fn takes the previous stage's output."""
+        def resample(split):
+            X_train, X_test, y_train, y_test = split
+            X_res, y_res = SMOTEHandler(random_state=self.seed, verbose=False,
+                                        engine=self.smote_engine).apply(X_train, y_train)
+            return X_res, y_res, X_test, y_test
+
+        def fit(data):
+            X_train, y_train, X_test, y_test = data
+            model = ModelTrainer(self.model_type, random_state=self.seed, verbose=False).get_model()
+            return model.fit(X_train, y_train), X_test, y_test
+
+        def evaluate(fitted):
+            model, X_test, y_test = fitted
+            return evaluate_probabilities(y_test, model.predict_proba(X_test)[:, 1], n_bootstrap=self.n_bootstrap,
+                                          random_state=self.seed)
+
+        def split(df):
+            X, y = LeakyFeatureRemover(target_col='SLA Breach', verbose=False).fit_transform(df)
+            return train_test_split(X, y, test_size=0.2, stratify=y, random_state=self.seed)
+
+        return [
+            ('null_handling', lambda df: DataProcessor(threshold=70).fit_transform(df)),
+            ('time_series', lambda df: TimeSeriesProcessor(df, reference_date_col='created_date',
+                                                           verbose=False).process()),
+            ('encoding', lambda df: FeatureEncoder(df, target_col='SLA Breach', verbose=False).encode()[0]),
+            ('leak_removal', split),
+            ('smote', resample),
+            ('training', fit),
+            ('evaluation', evaluate),
+        ]
+
+    def run_size(self, n_rows, run_id):
+        """One row per stage; with repeats > 1, the fastest (least noisy) of the repeats."""
+        tickets = generate_tickets(n_rows, seed=self.seed)
+        rows = []
+        for _ in range(self.repeats):
+            output = tickets
+            for name, stage in self._stages():
+                rows_in = _n_rows(output)
+                output, seconds, peak_mb = _measure(stage, output)
+                rows.append({'run_id': run_id, 'n_rows': n_rows, 'stage': name, 'seconds': seconds,
+                             'peak_mb': peak_mb, 'rows_in': rows_in})
+                if self.verbose:
+                    print(f" {n_rows:>10} rows | {name:<14} {seconds:8.2f}s {peak_mb:10.1f} MB")
+        best = pd.DataFrame(rows).groupby('stage', sort=False).agg(
+            {'run_id': 'first', 'n_rows': 'first', 'seconds': 'min', 'peak_mb': 'min', 'rows_in': 'first'}
+        )
+        return best.reset_index()[list(rows[0])].to_dict('records')
+
+    def run(self):
+        run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        meta = {'commit': _git_commit(), 'seed': self.seed, 'model_type': self.model_type,
+                'smote_engine': self.smote_engine, 'repeats': self.repeats, **_environment()}
+        if self.verbose:
+            print(f"\n Benchmark run {run_id} (commit {meta['commit']})")
+        rows = []
+        for n_rows in self.sizes:
+            rows.extend(self.run_size(n_rows, run_id))
+        for row in rows:
+            row.update(meta, peak_rss_mb=peak_rss_mb())
+        self.results_ = pd.DataFrame(rows)
+        self.save(rows)
+        return self.results_
+
+    def save(self, rows):
+        os.makedirs(os.path.dirname(self.history_path) or '.', exist_ok=True)
+        with open(self.history_path, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        if self.verbose:
+            print(f" Results appended to {self.history_path}")
+
+
+def load_history(path=BENCHMARK_HISTORY_PATH) -> pd.DataFrame:
+    return pd.read_json(path, lines=True, dtype={'run_id': str, 'commit': str})
+
+
+def compare(history_path=BENCHMARK_HISTORY_PATH, run_id=None, baseline_run_id=None, tolerance=0.2,
+            min_seconds=0.25):
+    """
+    Per (n_rows, stage) time and memory of `run_id` (default: latest) against
+    `baseline_run_id` (default: the run before it). `regression` marks stages more
+    than `tolerance` (relative) larger in peak memory, or slower by that much and
+    by at least `min_seconds` (sub-second stages are mostly timer noise).
+    """
+    history = load_history(history_path)
+    runs = sorted(history['run_id'].unique())
+    run_id = run_id or runs[-1]
+    if baseline_run_id is None:
+        earlier = [r for r in runs if r < run_id]
+        if not earlier:
+            raise ValueError(f"No baseline run before {run_id} in {history_path}")
+        baseline_run_id = earlier[-1]
+
+    keys = ['n_rows', 'stage']
+    current = history[history['run_id'] == run_id].set_index(keys)[['seconds', 'peak_mb']]
+    baseline = history[history['run_id'] == baseline_run_id].set_index(keys)[['seconds', 'peak_mb']]
+    report = baseline.join(current, lsuffix='_baseline', how='inner').reset_index()
+    report['time_ratio'] = report['seconds'] / report['seconds_baseline']
+    report['memory_ratio'] = report['peak_mb'] / report['peak_mb_baseline']
+    slower = (report['time_ratio'] > 1 + tolerance) & (report['seconds'] - report['seconds_baseline'] >= min_seconds)
+    report['regression'] = slower | (report['memory_ratio'] > 1 + tolerance)
+    report.attrs.update(run_id=run_id, baseline_run_id=baseline_run_id)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage time / memory benchmark on synthetic tickets")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--model-type', default='xgb', choices=['rf', 'xgb'])
+    parser.add_argument('--smote-engine', default='exact', choices=['exact', 'approximate'])
+    parser.add_argument('--repeats', type=int, default=1, help="runs per size; the fastest is stored")
+    parser.add_argument('--history', default=BENCHMARK_HISTORY_PATH)
+    parser.add_argument('--compare-only', action='store_true', help="only compare the last two stored runs")
+    parser.add_argument('--baseline', default=None, help="run_id to compare against (default: previous run)")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if not args.compare_only:
+        StageBenchmark(args.sizes, args.seed, args.model_type, args.smote_engine, repeats=args.repeats,
+                       history_path=args.history).run()
+    try:
+        report = compare(args.history, baseline_run_id=args.baseline, tolerance=args.tolerance)
+    except ValueError as e:
+        print(f" {e}; nothing to compare yet.")
+        sys.exit(0)
+    print(f"\n {report.attrs['run_id']} vs {report.attrs['baseline_run_id']}:")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    sys.exit(1 if report['regression'].any() else 0)
@@ -0,0 +1,134 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+SYNTHETIC_DATA_PATH = "data/raw/synthetic_itsm_tickets.csv"
+
+# Contractual resolution target per priority, in hours
+PRIORITY_SLA_HOURS = {'P1': 4, 'P2': 8, 'P3': 24, 'P4': 72}
+PRIORITY_WEIGHTS = [0.05, 0.20, 0.45, 0.30]
+REGIONS = ['AMER', 'EU', 'APAC']  # not 'NA': pandas reads it as a null
+REGION_WEIGHTS = [0.45, 0.35, 0.20]
+CATEGORIES = ['Network', 'Hardware', 'Software', 'Access', 'Database', 'Email', 'Security',
+              'Storage', 'Printing', 'VPN', 'Telephony', 'Other']
+ESCALATION_LEVELS = ['Level 1', 'Level 2', 'Level 3']
+
+
+def _timestamps(values: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    """datetime64[s] -> 'YYYY-MM-DD HH:MM:SS' strings (None where missing), as in the ServiceNow export."""
+    text = np.char.replace(np.datetime_as_string(values, unit='s'), 'T', ' ').astype(object)
+    text[missing] = None
+    return text
+
+
+def _skewed_ids(rng, exponent, cardinality, n):
+    """Zipf-distributed ids in 1..cardinality as strings (a few busy values, a long tail)."""
+    return ((rng.zipf(exponent, n) - 1) % cardinality + 1).astype(str)
+
+
+def _sample_breaches(rng, priority, escalated, breach_rate):
+    """Breach flags whose odds rise with priority urgency and escalation, rescaled to `breach_rate`."""
+    logit = np.select([priority == 'P1', priority == 'P2', priority == 'P3'], [1.0, 0.6, 0.0], -0.4)
+    logit = logit + 1.2 * escalated + rng.normal(0, 0.5, len(priority))
+    # bisect the intercept so the expected positive share matches breach_rate
+    low, high = -20.0, 20.0
+    for _ in range(40):
+        intercept = (low + high) / 2
+        if (1 / (1 + np.exp(-(logit + intercept)))).mean() < breach_rate:
+            low = intercept
+        else:
+            high = intercept
+    return rng.random(len(priority)) < 1 / (1 + np.exp(-(logit + intercept)))
+
+
+def generate_tickets(n_rows: int, seed: int = 42, breach_rate: float = 0.15, start='2024-01-01',
+                     n_customers=None, id_offset: int = 0) -> pd.DataFrame:
+    """
+    Seeded synthetic ITSM ticket export with the raw schema the pipeline expects.
+
+    Seven datetime columns (created, first_response, last_updated, due, escalated,
+    resolved, closed) as strings, `Escalation Level`, categoricals of low (Priority,
+    Region), medium (Category, Assignment Group) and high (Customer ID) cardinality,
+    realistic null rates (open tickets have no resolution/closure, most tickets are
+    never escalated, `Mostly Null` is ~92% empty) and an imbalanced `SLA Breach`
+    (about `breach_rate` positives) consistent with resolved_date > due_date.
+    The same (n_rows, seed, id_offset) always gives the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_rows
+    n_customers = n_customers or max(50, min(200_000, n // 20))
+
+    priority = rng.choice(list(PRIORITY_SLA_HOURS), n, p=PRIORITY_WEIGHTS)
+    escalated = rng.random(n) < np.where(np.isin(priority, ['P1', 'P2']), 0.55, 0.22)
+    breach = _sample_breaches(rng, priority, escalated, breach_rate)
+    open_ticket = rng.random(n) < 0.08
+
+    created = (np.datetime64(start, 's')
+               + rng.integers(0, 365 * 24 * 3600, n).astype('timedelta64[s]'))
+    sla_seconds = (pd.Series(priority).map(PRIORITY_SLA_HOURS).to_numpy() * 3600).astype('int64')
+    due = created + sla_seconds.astype('timedelta64[s]')
+    # resolution inside the SLA window for met tickets, 5% - 200% past it for breaches
+    fraction = np.where(breach, 1.05 + rng.exponential(0.5, n).clip(0, 2), rng.uniform(0.05, 0.95, n))
+    resolved = created + (sla_seconds * fraction).astype('int64').astype('timedelta64[s]')
+    first_response = created + (sla_seconds * rng.uniform(0.01, 0.25, n)).astype('int64').astype('timedelta64[s]')
+    escalation = created + (sla_seconds * rng.uniform(0.1, 0.9, n)).astype('int64').astype('timedelta64[s]')
+    closed = resolved + rng.integers(600, 3 * 24 * 3600, n).astype('timedelta64[s]')
+    last_updated = np.where(open_ticket, first_response, closed) + rng.integers(0, 3600, n).astype('timedelta64[s]')
+
+    escalation_level = rng.choice(ESCALATION_LEVELS, n, p=[0.6, 0.3, 0.1]).astype(object)
+    escalation_level[~escalated] = None
+    penalty = np.where(breach, rng.gamma(2.0, 250.0, n).round(2), np.nan)
+    penalty[rng.random(n) < 0.05] = np.nan
+    csat = rng.integers(1, 6, n).astype(float)
+    csat[open_ticket | (rng.random(n) < 0.35)] = np.nan
+
+    return pd.DataFrame({
+        'Ticket ID': np.char.add('INC', np.char.zfill((np.arange(n) + id_offset).astype(str), 9)),
+        'created_date': _timestamps(created, np.zeros(n, dtype=bool)),
+        'first_response_date': _timestamps(first_response, rng.random(n) < 0.03),
+        'last_updated_date': _timestamps(last_updated, rng.random(n) < 0.01),
+        'due_date': _timestamps(due, rng.random(n) < 0.02),
+        'escalated_date': _timestamps(escalation, ~escalated),
+        'resolved_date': _timestamps(resolved, open_ticket),
+        'closed_date': _timestamps(closed, open_ticket | (rng.random(n) < 0.04)),
+        'Priority': priority,
+        'Escalation Level': escalation_level,
+        'Category': rng.choice(CATEGORIES, n),
+        'Assignment Group': np.char.add('AG-', _skewed_ids(rng, 1.3, 40, n)),
+        'Customer ID': np.char.add('CUST', _skewed_ids(rng, 1.1, n_customers, n)),
+        'Region': rng.choice(REGIONS, n, p=REGION_WEIGHTS),
+        'Reopened Count': rng.poisson(np.where(breach, 0.4, 0.1)),
+        'Penalty Cost': penalty,
+        'CSAT Score': csat,
+        'Mostly Null': np.where(rng.random(n) < 0.92, np.nan, rng.normal(0, 1, n)),
+        'SLA Breach': breach,
+    })
+
+
+def write_synthetic_csv(path=SYNTHETIC_DATA_PATH, n_rows=1_000_000, seed=42, chunk_rows=1_000_000, **options):
+    """
+    Write `n_rows` synthetic tickets to CSV in chunks, so 10M-row exports never
+    sit in memory at once. Chunk i uses seed (seed, i), so output is reproducible.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    start = time.perf_counter()
+    for i, first in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = generate_tickets(min(chunk_rows, n_rows - first), seed=[seed, i], id_offset=first, **options)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        print(f" {first + len(chunk)} / {n_rows} rows written ({time.perf_counter() - start:.1f}s)")
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic ITSM ticket export")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--breach-rate', type=float, default=0.15)
+    parser.add_argument('--output', default=SYNTHETIC_DATA_PATH)
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    write_synthetic_csv(args.output, args.rows, args.seed, args.chunk_rows, breach_rate=args.breach_rate)
@@ -1,12 +1,143 @@
 import logging
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
+import numpy as np
+import pandas as pd
 import joblib  # for saving models
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def evaluate_and_save_best_model(model, X_test, y_test, model_save_path, 
-                                 current_best_score=None, metric='roc_auc'):
+# Bootstrap resamples are evaluated in blocks of at most this many (resample x row) cells
+_BOOTSTRAP_BLOCK_CELLS = 20_000_000
+
+
+def _sorted_groups(y_true, y_prob):
+    """Order by descending probability; returns (order, start of each tied-score group, group scores)."""
+    order = np.argsort(-y_prob, kind='mergesort')
+    scores = y_prob[order]
+    starts = np.flatnonzero(np.r_[True, scores[1:] != scores[:-1]])
+    return order, starts, scores[starts]
+
+
+def _curve_metrics(pos_weights, neg_weights, starts, group_scores, threshold):
+    """
+    ROC AUC, PR AUC (average precision), accuracy and F1 at `threshold` for one or
+    many weightings of the same rows. Weights are (..., n) in descending-score
+    order; every metric comes from cumulative sums over tied-score groups.
+    """
+    tp = np.cumsum(np.add.reduceat(pos_weights, starts, axis=-1), axis=-1)
+    fp = np.cumsum(np.add.reduceat(neg_weights, starts, axis=-1), axis=-1)
+    total_pos, total_neg = tp[..., -1:], fp[..., -1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tpr, fpr = tp / total_pos, fp / total_neg
+        precision = tp / (tp + fp)
+        zero = np.zeros(tp.shape[:-1] + (1,))
+        tpr0, fpr0 = np.concatenate([zero, tpr], axis=-1), np.concatenate([zero, fpr], axis=-1)
+        roc_auc = (np.diff(fpr0, axis=-1) * (tpr0[..., 1:] + tpr0[..., :-1]) / 2).sum(axis=-1)
+        pr_auc = (np.diff(tpr0, axis=-1) * precision).sum(axis=-1)
+
+        # groups scoring above the threshold are predicted positive
+        k = np.searchsorted(-group_scores, -threshold, side='left')
+        tp_at = tp[..., k - 1] if k else np.zeros(tp.shape[:-1])
+        fp_at = fp[..., k - 1] if k else np.zeros(fp.shape[:-1])
+        total_pos, total_neg = total_pos[..., 0], total_neg[..., 0]
+        accuracy = (tp_at + total_neg - fp_at) / (total_pos + total_neg)
+        f1 = 2 * tp_at / (tp_at + total_pos + fp_at)
+    return {'roc_auc': roc_auc, 'pr_auc': pr_auc, 'accuracy': accuracy, 'f1': f1}
+
+
+def threshold_sweep(y_true, y_prob) -> pd.DataFrame:
+    """Precision, recall and F1 for predicting positive at every distinct probability cut."""
+    y_true, y_prob = np.asarray(y_true, dtype=bool), np.asarray(y_prob, dtype=float)
+    order, starts, group_scores = _sorted_groups(y_true, y_prob)
+    positives = y_true[order].astype(float)
+    tp = np.cumsum(np.add.reduceat(positives, starts))
+    fp = np.cumsum(np.add.reduceat(1 - positives, starts))
+    fn = tp[-1] - tp
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precision = tp / (tp + fp)
+        recall = tp / tp[-1]
+        f1 = 2 * tp / (2 * tp + fp + fn)
+    return pd.DataFrame({
+        'threshold': group_scores, 'tp': tp, 'fp': fp, 'fn': fn,
+        'precision': precision, 'recall': recall, 'f1': f1,
+    })
+
+
+def calibration_table(y_true, y_prob, n_bins=10):
+    """Reliability table over equal-width probability bins, plus expected calibration error and Brier score."""
+    y_true, y_prob = np.asarray(y_true, dtype=float), np.asarray(y_prob, dtype=float)
+    bins = np.minimum((y_prob * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_prob = np.bincount(bins, weights=y_prob, minlength=n_bins) / counts
+        observed = np.bincount(bins, weights=y_true, minlength=n_bins) / counts
+    table = pd.DataFrame({
+        'bin_low': np.arange(n_bins) / n_bins, 'bin_high': np.arange(1, n_bins + 1) / n_bins,
+        'count': counts, 'mean_predicted': mean_prob, 'observed_rate': observed,
+    })
+    ece = float(np.nansum(counts * np.abs(mean_prob - observed)) / len(y_true))
+    brier = float(np.mean((y_prob - y_true) ** 2))
+    return table, ece, brier
+
+
+def bootstrap_metrics(y_true, y_prob, threshold=0.5, n_bootstrap=1000, confidence=0.95, random_state=42) -> dict:
+    """
+    Bootstrap confidence intervals for ROC AUC, PR AUC, accuracy and F1.
+
+    Each resample is expressed as per-row draw counts, so all resamples reuse one
+    sort of the probabilities and are evaluated together as a weight matrix
+    (in blocks of resamples to bound memory).
+    """
+    y_true, y_prob = np.asarray(y_true, dtype=bool), np.asarray(y_prob, dtype=float)
+    n = len(y_true)
+    order, starts, group_scores = _sorted_groups(y_true, y_prob)
+    positives = y_true[order]
+    rng = np.random.default_rng(random_state)
+    block = max(1, _BOOTSTRAP_BLOCK_CELLS // n)
+
+    samples = {name: [] for name in ('roc_auc', 'pr_auc', 'accuracy', 'f1')}
+    for first in range(0, n_bootstrap, block):
+        size = min(block, n_bootstrap - first)
+        draws = rng.integers(0, n, size=(size, n)) + (np.arange(size) * n)[:, None]
+        weights = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n).astype(float)
+        metrics = _curve_metrics(weights * positives, weights * ~positives, starts, group_scores, threshold)
+        for name, values in metrics.items():
+            samples[name].append(values)
+
+    alpha = (1 - confidence) / 2
+    intervals = {}
+    for name, values in samples.items():
+        values = np.concatenate(values)
+        low, high = np.nanquantile(values, [alpha, 1 - alpha])
+        intervals[name] = (float(low), float(high))
+    return intervals
+
+
+def evaluate_probabilities(y_true, y_prob, threshold=0.5, n_bootstrap=1000, n_bins=10, random_state=42) -> dict:
+    """Every evaluation metric derived from one vector of positive-class probabilities."""
+    y_true, y_prob = np.asarray(y_true, dtype=bool), np.asarray(y_prob, dtype=float)
+    order, starts, group_scores = _sorted_groups(y_true, y_prob)
+    positives = y_true[order].astype(float)
+    point = _curve_metrics(positives, 1 - positives, starts, group_scores, threshold)
+    sweep = threshold_sweep(y_true, y_prob)
+    calibration, ece, brier = calibration_table(y_true, y_prob, n_bins)
+    best = sweep.loc[sweep['f1'].idxmax()]
+
+    report = {name: float(value) for name, value in point.items()}
+    report.update({
+        'threshold': threshold, 'brier_score': brier, 'expected_calibration_error': ece,
+        'best_f1_threshold': float(best['threshold']), 'best_f1': float(best['f1']),
+        'threshold_sweep': sweep, 'calibration': calibration,
+    })
+    if n_bootstrap:
+        report['confidence_intervals'] = bootstrap_metrics(
+            y_true, y_prob, threshold, n_bootstrap, random_state=random_state
+        )
+    return report
+
+
+def evaluate_and_save_best_model(model, X_test, y_test, model_save_path,
+                                 current_best_score=None, metric='roc_auc', threshold=0.5,
+                                 n_bootstrap=1000, return_report=False, registry=None):
     """
     Evaluate the model, print metrics, and save the model if it's the best so far.
 
@@ -16,40 +147,65 @@ def evaluate_and_save_best_model(model, X_test, y_test, model_save_path,
     - y_test: True labels for test.
     - model_save_path: Path to save the best model.
     - current_best_score: Previous best score to compare against. If None, saves current model.
-    - metric: Metric used to determine best model. Supports 'roc_auc' or 'accuracy'.
+    - metric: Metric used to determine best model. Supports 'roc_auc', 'pr_auc', 'f1' or 'accuracy'.
+    - threshold: Probability above which a ticket is labelled a breach.
+    - n_bootstrap: Bootstrap resamples for the confidence intervals (0 disables them).
+    - return_report: Also return the evaluate_probabilities() report.
+    - registry: Optional ModelRegistry. The candidate is registered with its metrics and
+      feature schema, and the registry champion's score replaces current_best_score.
+
+    The model is scored once (predict_proba); labels, accuracy and every other
+    metric are derived from that probability vector.
 
     Returns:
     - best_score: The better score between current and previous best.
     - saved: Boolean, whether the model was saved.
+    - report (only with return_report=True): dict of metrics, threshold sweep and calibration table.
     """
-    y_pred = model.predict(X_test)
+    from sklearn.metrics import classification_report, confusion_matrix
 
+    y_test = np.asarray(y_test)
     try:
+        classes = model.classes_
         y_prob = model.predict_proba(X_test)[:, 1]
-        roc_auc = roc_auc_score(y_test, y_prob)
+        y_pred = np.where(y_prob > threshold, classes[1], classes[0])
+        report = evaluate_probabilities(y_test == classes[1], y_prob, threshold, n_bootstrap)
     except (AttributeError, IndexError):
-        y_prob = None
-        roc_auc = None
-
-    acc = model.score(X_test, y_test)
+        y_pred = model.predict(X_test)
+        report = {'accuracy': float(np.mean(y_pred == y_test))}
+    acc = report['accuracy']
 
     logger.info("Classification Report:\n%s", classification_report(y_test, y_pred))
     logger.info("Confusion Matrix:\n%s", confusion_matrix(y_test, y_pred))
 
-    if roc_auc is not None:
-        logger.info("ROC AUC Score: %.4f", roc_auc)
+    if 'roc_auc' in report:
+        logger.info("ROC AUC Score: %.4f | PR AUC: %.4f | Brier: %.4f | ECE: %.4f",
+                    report['roc_auc'], report['pr_auc'], report['brier_score'],
+                    report['expected_calibration_error'])
+        logger.info("Best F1 %.4f at threshold %.3f", report['best_f1'], report['best_f1_threshold'])
+        for name, (low, high) in report.get('confidence_intervals', {}).items():
+            logger.info("%s %.4f (95%% CI %.4f - %.4f)", name, report[name], low, high)
     else:
         logger.warning("ROC AUC not available - model does not support predict_proba or binary classification")
 
     # Decide which metric to use for saving
-    if metric == 'roc_auc' and roc_auc is not None:
-        score = roc_auc
+    if metric in ('roc_auc', 'pr_auc', 'f1') and metric in report:
+        score = report[metric]
     elif metric == 'accuracy':
         score = acc
     else:
         # fallback to accuracy if ROC AUC not available
         score = acc
 
+    if registry is not None:
+        champion = registry.champion()
+        current_best_score = champion['metrics'].get(metric) if champion else None
+        scalars = {k: v for k, v in report.items() if isinstance(v, float)}
+        version = registry.register(model, {**scalars, metric: score}, metric=metric,
+                                    feature_names=getattr(X_test, 'columns', None), promote=False)
+        if current_best_score is None or score > current_best_score:
+            registry.promote(version)
+
     saved = False
     if current_best_score is None or score > current_best_score:
         joblib.dump(model, model_save_path)
@@ -60,4 +216,6 @@ def evaluate_and_save_best_model(model, X_test, y_test, model_save_path,
         logger.info(f"Model not saved. Current best {metric}: {current_best_score:.4f} is better than {score:.4f}")
         best_score = current_best_score
 
+    if return_report:
+        return best_score, saved, report
     return best_score, saved
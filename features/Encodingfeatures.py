@@ -1,32 +1,102 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
+import scipy.sparse as sp
 from pandas.api.types import is_numeric_dtype, is_bool_dtype
-import warnings
-warnings.filterwarnings('ignore')
+from utils.sparse_frame import SparseFeatureFrame
+from features.vocabulary_store import VocabularyStore
 
 class FeatureEncoder:
-    def __init__(self, df, target_col='SLA Breach', verbose=True):
+    """
+    Picks an encoding per column (one-hot for <= 10 categories, label encoding above).
+
+    `vocabularies` (column -> sorted list of category strings) freezes the categories
+    instead of learning them from `df`, so separately encoded chunks of one dataset
+    get identical columns and codes. Values outside a frozen vocabulary get
+    all-zero one-hot rows and label code -1. A VocabularyStore can be passed
+    instead of a dict; label-encoded columns are then mapped with its
+    memory-mapped hash index rather than a LabelEncoder.
+
+    The fitted vocabularies are kept in `vocabularies_`; save_vocabularies()
+    writes them to a VocabularyStore for inference.
+
+    With `sparse=True`, encode() returns a SparseFeatureFrame: the one-hot blocks
+    are built straight into CSR next to the numeric block, with the target kept
+    aside, instead of dense dummy columns.
+    """
+    def __init__(self, df, target_col='SLA Breach', verbose=True, vocabularies=None, sparse=False):
         self.df = df.copy()
         self.target_col = target_col
         self.verbose = verbose
+        self.vocabularies = vocabularies or {}
+        self.sparse = sparse
         self.encoders = {}
+        self.vocabularies_ = {}
         self.strategy_df = pd.DataFrame()
 
     def _is_engineered_feature(self, col):
         keywords = ['hour', 'day', 'month', 'year', 'time']
         return any(k in col.lower() for k in keywords) and is_numeric_dtype(self.df[col])
 
+    def _vocabulary_size(self, col):
+        if isinstance(self.vocabularies, VocabularyStore):
+            return self.vocabularies.size(col)
+        return len(self.vocabularies[col])
+
+    def _vocabulary(self, col):
+        if isinstance(self.vocabularies, VocabularyStore):
+            return self.vocabularies.categories(col)
+        return list(self.vocabularies[col])
+
+    def _lookup(self, col, values):
+        if isinstance(self.vocabularies, VocabularyStore):
+            return self.vocabularies.lookup(col, values)
+        return pd.Index(self.vocabularies[col]).get_indexer(values.astype(str))
+
+    def save_vocabularies(self, path):
+        """Write the vocabularies of the last encode() to a VocabularyStore at `path`."""
+        return VocabularyStore.build(self.vocabularies_, path)
+
+    @staticmethod
+    def _as_categorical(values):
+        return values.cat if isinstance(values.dtype, pd.CategoricalDtype) else pd.Categorical(values)
+
+    def _to_sparse(self, df, onehot):
+        """CSR matrix of the numeric columns followed by every one-hot block."""
+        target = df[self.target_col] if self.target_col in df.columns else None
+        numeric = df.drop(columns=[self.target_col], errors='ignore')
+        blocks = [sp.csr_matrix(numeric.to_numpy(dtype='float32'))]
+        columns = list(numeric.columns)
+
+        rows = np.arange(len(df))
+        for col, values in onehot:
+            categorical = self._as_categorical(values)
+            codes = np.asarray(categorical.codes)
+            known = codes >= 0
+            blocks.append(sp.csr_matrix(
+                (np.ones(known.sum(), dtype='float32'), (rows[known], codes[known])),
+                shape=(len(df), len(categorical.categories))
+            ))
+            columns.extend(f'{col}_{category}' for category in categorical.categories)
+
+        return SparseFeatureFrame(sp.hstack(blocks, format='csr'), columns, df.index, target)
+
     def encode(self):
         strategies = []
         df = self.df
+        onehot = []  # (column, values) pairs, expanded in one pass after the loop
 
         for col in df.columns:
             if col == self.target_col:
                 continue
 
-            n_unique = df[col].nunique()
+            frozen = col in self.vocabularies
             col_type = df[col].dtype
+            if frozen:
+                n_unique = self._vocabulary_size(col)
+            elif self.verbose or not is_numeric_dtype(col_type):
+                n_unique = df[col].nunique()
+            else:
+                n_unique = None  # numeric columns only need it for the printed overview
 
             if self._is_engineered_feature(col):
                 strategy = 'Already Feature Engineered'
@@ -40,14 +110,25 @@ class FeatureEncoder:
 
             elif n_unique <= 10:
                 strategy = 'Categorical - OneHotEncoding'
-                dummies = pd.get_dummies(df[col], prefix=col)
-                df = pd.concat([df.drop(columns=[col]), dummies], axis=1)
+                values = df[col] if not frozen else pd.Series(
+                    pd.Categorical(df[col].astype(str), categories=self._vocabulary(col)), index=df.index)
+                onehot.append((col, values))
+                self.vocabularies_[col] = [str(c) for c in self._as_categorical(values).categories]
+
+            elif n_unique > 10 and frozen:
+                strategy = 'Categorical - LabelEncoding'
+                df[col] = self._lookup(col, df[col])
+                if not isinstance(self.vocabularies, VocabularyStore):  # a store is already saved
+                    self.vocabularies_[col] = self._vocabulary(col)
 
             elif n_unique > 10:
+                from sklearn.preprocessing import LabelEncoder  # only fitting needs sklearn
+
                 strategy = 'Categorical - LabelEncoding'
                 le = LabelEncoder()
                 df[col] = le.fit_transform(df[col].astype(str))
                 self.encoders[col] = le
+                self.vocabularies_[col] = le.classes_
 
             else:
                 strategy = 'Unknown'
@@ -59,6 +140,13 @@ class FeatureEncoder:
                 'Encoding Strategy': strategy
             })
 
+        onehot_cols = [col for col, _ in onehot]
+        if self.sparse:
+            df = self._to_sparse(df.drop(columns=onehot_cols), onehot)
+        elif onehot:
+            dummies = [pd.get_dummies(values, prefix=col) for col, values in onehot]
+            df = pd.concat([df.drop(columns=onehot_cols)] + dummies, axis=1)
+
         self.df = df
         self.strategy_df = pd.DataFrame(strategies).sort_values(by='Encoding Strategy')
 
@@ -68,6 +156,27 @@ class FeatureEncoder:
 
         return self.df, self.strategy_df, self.encoders
 
+
+def prepare_native_categorical(df, target_col='SLA Breach', categories=None):
+    """
+    Encoding-free alternative to FeatureEncoder for tree models that split categories
+    natively (XGBoost with enable_categorical): string columns become pandas `category`,
+    datetimes become epoch seconds. `categories` (column -> list) pins the categories,
+    e.g. to the training frame's when preparing new tickets.
+    """
+    df = df.copy()
+    categories = categories or {}
+    for col in df.columns:
+        if col == target_col:
+            continue
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = (df[col] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+        elif col in categories:
+            df[col] = pd.Categorical(df[col].astype(str), categories=categories[col])
+        elif df[col].dtype == object or isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str).astype('category')
+    return df
+
 # if __name__ == "__main__":
    
 #    test_data =  pd.read_csv("data/processed/processed_time_series_data.csv")
@@ -1,64 +1,142 @@
 import logging
+import numbers
+from pathlib import Path
 
+import joblib
 import pandas as pd
-import mlflow
-from sklearn.experimental import enable_iterative_imputer  # noqa: F401
-from sklearn.impute import SimpleImputer, IterativeImputer
-# Setup logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+from pandas.api.types import is_float_dtype
+
 logger = logging.getLogger(__name__)
 class DataProcessor:
-    def __init__(self, df):
+    """
+    Drops mostly-null columns and imputes the rest.
+
+    fit() learns the dropped-column list and one fill value per remaining column
+    ('Unknown' for Escalation Level, mode for categorical/datetime columns, median
+    for numeric ones); transform() applies them to any frame in O(rows) without
+    recomputing statistics. save()/load() persist the fitted state so new tickets
+    are imputed with the training-set values. verbose=False logs the per-column
+    fill messages at DEBUG instead of INFO (e.g. once per scoring request).
+    """
+    def __init__(self, df=None, threshold=70, verbose=True):
         self.df = df
-        self.df_cleaned = df.copy()
+        self.df_cleaned = df.copy() if df is not None else None
+        self.threshold = threshold
+        self.verbose = verbose
+        self.dropped_columns_ = []
+        self.fill_values_ = {}
 
-    def remove_high_null_columns(self, threshold=70):
-        null_percentage = self.df_cleaned.isnull().mean() * 100
-        cols_to_remove = null_percentage[null_percentage > threshold].index.tolist()
-        if cols_to_remove:
-            self.df_cleaned.drop(columns=cols_to_remove, inplace=True)
-            logger.info(f"Removed columns with >{threshold}% nulls: {cols_to_remove}")
+    # ------------------------------------------------------------------ fit
+    def _find_high_null_columns(self, df, threshold):
+        null_percentage = df.isnull().mean() * 100
+        return null_percentage[null_percentage > threshold].index.tolist()
 
-    def handle_missing_values(self):
-        logger.info("Handling missing values...")
+    def _compute_fill_values(self, df):
+        fill_values = {}
 
-        # 1. Handle 'Escalation Level'
-        if 'Escalation Level' in self.df_cleaned.columns:
-            self.df_cleaned['Escalation Level'] = self.df_cleaned['Escalation Level'].fillna('Unknown')
-            logger.info("Filled missing values in 'Escalation Level' with 'Unknown'.")
+        # 1. 'Escalation Level': missing means no escalation
+        if 'Escalation Level' in df.columns:
+            fill_values['Escalation Level'] = 'Unknown'
 
-        # 2. Other categorical columns
-        categorical_cols = self.df_cleaned.select_dtypes(include=['object']).columns.tolist()
+        # 2. Other categorical columns (datetimes resolved by the columnar cache count as categorical here)
+        categorical_cols = df.select_dtypes(include=['object', 'category', 'datetime']).columns.tolist()
         if 'Escalation Level' in categorical_cols:
             categorical_cols.remove('Escalation Level')  # Already handled
 
         for col in categorical_cols:
-            if self.df_cleaned[col].isnull().sum() > 0:
-                mode_val = self.df_cleaned[col].mode()
-                if not mode_val.empty:
-                    self.df_cleaned[col] = self.df_cleaned[col].fillna(mode_val[0])
-                    logger.info(f"Filled missing in categorical column '{col}' with mode: {mode_val[0]}")
-                else:
-                    logger.warning(f"Skipped '{col}' (no mode found).")
+            mode_val = df[col].mode()
+            if not mode_val.empty:
+                fill_values[col] = mode_val[0]
+            else:
+                logger.warning(f"Skipped '{col}' (no mode found).")
 
         # 3. Numeric columns
-        numeric_cols = self.df_cleaned.select_dtypes(include=['int64', 'float64']).columns.tolist()
+        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
         for col in numeric_cols:
-            if self.df_cleaned[col].isnull().sum() > 0:
-                median_val = self.df_cleaned[col].median()
-                self.df_cleaned[col] = self.df_cleaned[col].fillna(median_val)
-                logger.info(f"Filled missing in numeric column '{col}' with median: {median_val}")
+            median_val = df[col].median()
+            if pd.notna(median_val):
+                fill_values[col] = median_val
+
+        return fill_values
+
+    def fit(self, df):
+        self.dropped_columns_ = self._find_high_null_columns(df, self.threshold)
+        self.fill_values_ = self._compute_fill_values(df.drop(columns=self.dropped_columns_))
+        return self
+
+    # ------------------------------------------------------------ transform
+    @staticmethod
+    def _fill_column(df, col, value):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+            series = series.cat.add_categories([value])
+        if series.dtype == object or (is_float_dtype(series.dtype) and not isinstance(value, numbers.Number)):
+            # fillna into an object result silently infers its dtype (deprecated); fill, then infer
+            # explicitly. Also covers an all-null ticket column (float64) filled with a date or string.
+            values = series.astype(object).to_numpy(copy=True)
+            values[series.isnull().to_numpy()] = value
+            df[col] = pd.Series(values, index=series.index, name=col).infer_objects(copy=False)
+        else:
+            df[col] = series.fillna(value)
+
+    def _fill_missing(self, df):
+        log = logger.info if self.verbose else logger.debug
+        log("Handling missing values...")
+        for col, value in self.fill_values_.items():
+            if col in df.columns and df[col].isnull().any():
+                self._fill_column(df, col, value)
+                log(f"Filled missing in column '{col}' with: {value}")
 
-        # 4. Final missing check
-        remaining = self.df_cleaned.isnull().sum()
+        # Final missing check
+        remaining = df.isnull().sum()
         remaining = remaining[remaining > 0]
 
         if len(remaining) == 0:
-            logger.info(" All missing values handled successfully!")
+            log(" All missing values handled successfully!")
         else:
             logger.warning(" Missing values remain in columns:")
             for col, count in remaining.items():
                 logger.warning(f"    {col}: {count} missing")
+        return df
+
+    def transform(self, df):
+        df = df.drop(columns=[col for col in self.dropped_columns_ if col in df.columns])
+        if self.dropped_columns_ and self.verbose:
+            logger.info(f"Removed columns with >{self.threshold}% nulls: {self.dropped_columns_}")
+        return self._fill_missing(df)
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    # ------------------------------------------------------ persistence
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({
+            'threshold': self.threshold,
+            'dropped_columns': self.dropped_columns_,
+            'fill_values': self.fill_values_,
+        }, path)
+        logger.info(f"Saved null-handling statistics to {path}")
+
+    @classmethod
+    def load(cls, path, verbose=True):
+        state = joblib.load(path)
+        processor = cls(threshold=state['threshold'], verbose=verbose)
+        processor.dropped_columns_ = state['dropped_columns']
+        processor.fill_values_ = state['fill_values']
+        return processor
+
+    # ------------------------------------------- in-place API on df_cleaned
+    def remove_high_null_columns(self, threshold=70):
+        self.threshold = threshold
+        self.dropped_columns_ = self._find_high_null_columns(self.df_cleaned, threshold)
+        if self.dropped_columns_:
+            self.df_cleaned.drop(columns=self.dropped_columns_, inplace=True)
+            logger.info(f"Removed columns with >{threshold}% nulls: {self.dropped_columns_}")
+
+    def handle_missing_values(self):
+        self.fill_values_ = self._compute_fill_values(self.df_cleaned)
+        self.df_cleaned = self._fill_missing(self.df_cleaned)
 
     def find_columns_with_nulls(self):
         nulls = self.df_cleaned.isnull().mean() * 100
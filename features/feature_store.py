@@ -0,0 +1,197 @@
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from features.frozen_pipeline import FrozenFeaturePipeline
+from features.handletimeseriesdata import TimeSeriesProcessor, resolve_as_of
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_DIR = "data/processed/feature_store"
+# stored key columns; the raw id / timestamp columns are model features themselves
+KEY_COL, UPDATED_KEY_COL = '_ticket_key', '_updated_key'
+AS_OF_KEY_COL = '_as_of_key'  # index only: the as-of time a ticket's stored features were computed at
+REGION_KEY_COL = '_region_key'  # raw region, kept when regional holiday calendars are in use
+
+
+class IncrementalFeatureStore:
+    """
+    Persisted per-ticket feature table refreshed in O(changed rows).
+
+    Tickets are keyed by `id_col` and `updated_col`. refresh() compares an
+    export's keys with the store's index and runs the frozen feature pipeline
+    (fitted null handler, datetime formats and vocabulary store; see
+    FrozenFeaturePipeline) only on tickets that are new or whose last-updated
+    timestamp changed. Their rows are appended as a new Parquet part and the
+    index is repointed, so existing parts are never rewritten; load() keeps the
+    newest row per ticket and compact() folds every part into one.
+
+    Keys are stored as KEY_COL / UPDATED_KEY_COL next to the feature columns,
+    because the raw id and timestamp columns are model features too.
+
+    Each refresh computes its rows at one as-of time, recorded in the index.
+    Unchanged tickets are not recomputed as time passes: load() re-ages stored
+    rows to the requested as-of time (default: the latest refresh) with
+    TimeSeriesProcessor.reage, which only touches ticket ages and business days
+    from year start.
+
+    Frozen vocabularies mean categories first seen after training encode as
+    unknown, exactly as in scoring; refit the full pipeline to learn them.
+    """
+    def __init__(self, store_dir=FEATURE_STORE_DIR, features: FrozenFeaturePipeline = None, id_col='Ticket ID',
+                 updated_col='last_updated_date', target_col='SLA Breach', verbose=True):
+        self.store_dir = Path(store_dir)
+        self._features = features
+        self.id_col = id_col
+        self.updated_col = updated_col
+        self.target_col = target_col
+        self.verbose = verbose
+        self.last_refresh_ = {}
+
+    @property
+    def features(self) -> FrozenFeaturePipeline:
+        if self._features is None:
+            self._features = FrozenFeaturePipeline.from_artifacts(target_col=self.target_col)
+        return self._features
+
+    @property
+    def index_path(self):
+        return self.store_dir / "index.parquet"
+
+    def parts(self):
+        return sorted(self.store_dir.glob("part-*.parquet"))
+
+    def index(self) -> pd.DataFrame:
+        """One row per stored ticket: id, last-updated timestamp and the part holding its features."""
+        if not self.index_path.exists():
+            return pd.DataFrame({KEY_COL: pd.Series(dtype=object),
+                                 UPDATED_KEY_COL: pd.Series(dtype='datetime64[ns]'),
+                                 'part': pd.Series(dtype='int32'),
+                                 AS_OF_KEY_COL: pd.Series(dtype='datetime64[ns]')})
+        return pd.read_parquet(self.index_path)
+
+    def _parse_updated(self, values):
+        fmt = self.features.datetime_formats.get(self.updated_col)
+        return pd.to_datetime(values, format=fmt, errors='coerce')
+
+    # -------------------------------------------------------------- refresh
+    def changed_rows(self, tickets: pd.DataFrame, index: pd.DataFrame = None):
+        """(changed tickets, their parsed last-updated times): new ids, or ids whose timestamp moved."""
+        index = self.index() if index is None else index
+        missing = [col for col in (self.id_col, self.updated_col) if col not in tickets.columns]
+        if missing:
+            raise ValueError(f"Incremental refresh needs ticket key columns {missing}.")
+        keys = pd.DataFrame({KEY_COL: tickets[self.id_col].to_numpy(),
+                             UPDATED_KEY_COL: self._parse_updated(tickets[self.updated_col]).to_numpy()},
+                            index=tickets.index)
+        # an export may list a ticket more than once; its latest version wins
+        keys = keys.sort_values(UPDATED_KEY_COL, kind='stable').drop_duplicates(KEY_COL, keep='last')
+        known = keys[KEY_COL].map(index.set_index(KEY_COL)[UPDATED_KEY_COL])
+        stored = keys[KEY_COL].isin(index[KEY_COL])
+        same = stored & ((known == keys[UPDATED_KEY_COL]) | (known.isna() & keys[UPDATED_KEY_COL].isna()))
+        keys = keys[~same]
+        return tickets.loc[keys.index], keys[UPDATED_KEY_COL]
+
+    @property
+    def _regional(self):
+        return isinstance(self.features.time_series_options.get('holidays'), dict)
+
+    def refresh(self, tickets: pd.DataFrame, as_of=None) -> int:
+        """
+        Recompute and store features for new / updated tickets at `as_of`
+        (default: now); returns how many rows were written.
+        """
+        start = time.perf_counter()
+        as_of = resolve_as_of(as_of)
+        index = self.index()
+        changed, updated = self.changed_rows(tickets, index)
+        self.last_refresh_ = {'input_rows': len(tickets), 'changed_rows': len(changed), 'seconds': 0.0,
+                              'as_of': as_of}
+        if changed.empty:
+            if self.verbose:
+                print(f" Feature store up to date ({len(tickets)} tickets checked)")
+            return 0
+
+        rows = self.features.transform(changed, as_of)
+        rows.insert(0, UPDATED_KEY_COL, updated.to_numpy())
+        rows.insert(0, KEY_COL, changed[self.id_col].to_numpy())
+        region_col = self.features.time_series_options.get('region_col')
+        if self._regional and region_col in changed.columns:
+            rows[REGION_KEY_COL] = changed[region_col].to_numpy()
+        if self.target_col in changed.columns:
+            rows[self.target_col] = changed[self.target_col].to_numpy()
+
+        part = int(self.parts()[-1].stem.split('-')[1]) + 1 if self.parts() else 0
+        self._write(rows, self.store_dir / f"part-{part:05d}.parquet")
+
+        new_keys = pd.DataFrame({KEY_COL: rows[KEY_COL], UPDATED_KEY_COL: rows[UPDATED_KEY_COL],
+                                 'part': part, AS_OF_KEY_COL: as_of}).astype({'part': 'int32'})
+        index = pd.concat([index[~index[KEY_COL].isin(new_keys[KEY_COL])], new_keys], ignore_index=True)
+        self._write(index, self.index_path)
+
+        self.last_refresh_['seconds'] = time.perf_counter() - start
+        if self.verbose:
+            print(f" Feature store refreshed: {len(changed)} of {len(tickets)} tickets recomputed into part {part} "
+                  f"({len(index)} tickets stored, {self.last_refresh_['seconds']:.1f}s)")
+        return len(changed)
+
+    def _write(self, df, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.parquet.tmp')
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+
+    # ----------------------------------------------------------------- read
+    def _reage(self, df, computed_at, as_of):
+        """Move rows computed at `computed_at` to `as_of` without recomputing their other features."""
+        options = dict(self.features.time_series_options)
+        if self._regional:
+            options['region_col'] = REGION_KEY_COL
+        processor = TimeSeriesProcessor(df.iloc[:0], datetime_columns=list(self.features.datetime_formats),
+                                        as_of=computed_at, verbose=False, **options)
+        return processor.reage(as_of, df)
+
+    def load(self, include_keys=False, as_of=None) -> pd.DataFrame:
+        """
+        Current features (plus target) for every stored ticket, newest version
+        of each, aged to `as_of` (default: the latest refresh's as-of time).
+        """
+        index = self.index()
+        as_of = index[AS_OF_KEY_COL].max() if as_of is None else resolve_as_of(as_of)
+        frames = []
+        for path in self.parts():
+            part = int(path.stem.split('-')[1])
+            current = index[index['part'] == part]
+            if current.empty:
+                continue
+            df = pd.read_parquet(path)
+            df = df[df[KEY_COL].isin(current[KEY_COL])]
+            computed_at = current[AS_OF_KEY_COL].iloc[0]  # one refresh per part
+            frames.append(df if computed_at == as_of else self._reage(df, computed_at, as_of))
+        if not frames:
+            raise FileNotFoundError(f"Feature store at {self.store_dir} is empty; run refresh() first.")
+        df = pd.concat(frames, ignore_index=True)
+        keys = [KEY_COL, UPDATED_KEY_COL] + ([REGION_KEY_COL] if REGION_KEY_COL in df.columns else [])
+        return df if include_keys else df.drop(columns=keys)
+
+    def compact(self):
+        """Rewrite the live rows as a single part, aged to the latest refresh, and drop superseded parts."""
+        old_parts = self.parts()
+        if len(old_parts) <= 1:
+            return
+        index = self.index()
+        as_of = index[AS_OF_KEY_COL].max()
+        df = self.load(include_keys=True, as_of=as_of)
+        part = int(old_parts[-1].stem.split('-')[1]) + 1
+        self._write(df, self.store_dir / f"part-{part:05d}.parquet")
+        index['part'] = pd.Series(part, index=index.index, dtype='int32')
+        index[AS_OF_KEY_COL] = as_of
+        self._write(index, self.index_path)
+        for path in old_parts:
+            path.unlink()
+        logger.info(f"Compacted {len(old_parts)} feature store parts into part {part} ({len(df)} tickets)")
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from features.Missing_null_pipeline import DataProcessor
+from features.handletimeseriesdata import TimeSeriesProcessor
+from features.Encodingfeatures import FeatureEncoder
+from features.vocabulary_store import VocabularyStore
+from utils.artifacts import (
+    DATETIME_FORMATS_PATH, FEATURE_NAMES_PATH, NULL_HANDLER_PATH, TIME_SERIES_OPTIONS_PATH, VOCABULARY_PATH,
+    load_feature_names, load_time_series_options,
+)
+from utils.datetime_formats import load_datetime_formats
+
+
+class FrozenFeaturePipeline:
+    """
+    The fitted DataProcessor -> TimeSeriesProcessor -> FeatureEncoder chain with
+    every statistic frozen: training-set fill values, the recorded datetime
+    formats, the saved vocabulary store and the model's input columns. Each row's
+    features depend only on that row, so any subset of tickets can be
+    transformed on its own (scoring batches, incremental refreshes).
+
+    Ticket ages and the year-start anchor are measured at `as_of`: the
+    transform() argument, else this attribute, else the time of the call.
+    """
+    def __init__(self, null_handler, datetime_formats, vocabularies, feature_names, target_col='SLA Breach',
+                 time_series_options=None, as_of=None):
+        self.null_handler = null_handler
+        self.datetime_formats = datetime_formats
+        self.vocabularies = vocabularies
+        self.feature_names = list(feature_names)
+        self.target_col = target_col
+        self.time_series_options = time_series_options or {}
+        self.as_of = as_of
+        self.input_columns = [
+            col for col in dict.fromkeys([*null_handler.fill_values_, *datetime_formats]) if col != target_col
+        ]
+
+    @classmethod
+    def from_artifacts(cls, null_handler_path=NULL_HANDLER_PATH, datetime_formats_path=DATETIME_FORMATS_PATH,
+                       vocabulary_path=VOCABULARY_PATH, feature_names=None, feature_names_path=FEATURE_NAMES_PATH,
+                       time_series_options_path=TIME_SERIES_OPTIONS_PATH, **kwargs):
+        """The training run's artifacts, including the business calendar its time features used."""
+        kwargs.setdefault('time_series_options', load_time_series_options(time_series_options_path))
+        return cls(
+            null_handler=DataProcessor.load(null_handler_path, verbose=False),
+            datetime_formats=load_datetime_formats(datetime_formats_path),
+            vocabularies=VocabularyStore(vocabulary_path),
+            feature_names=feature_names if feature_names is not None else load_feature_names(feature_names_path),
+            **kwargs,
+        )
+
+    def transform(self, tickets, as_of=None) -> pd.DataFrame:
+        """Model-ready features for a list of ticket dicts (or a raw DataFrame), in `feature_names` order."""
+        df = tickets if isinstance(tickets, pd.DataFrame) else pd.DataFrame.from_records(tickets)
+        # keys missing from a ticket are imputed like nulls; unknown keys are kept
+        df = df.reindex(columns=list(dict.fromkeys([*self.input_columns, *df.columns])))
+        df = df.drop(columns=[self.target_col], errors='ignore')
+        df = self.null_handler.transform(df)
+
+        for col in df.columns:
+            if col not in self.datetime_formats and col not in self.vocabularies and df[col].dtype == object:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        processor = TimeSeriesProcessor(df, reference_date_col='created_date', verbose=False,
+                                        datetime_formats=self.datetime_formats,
+                                        as_of=as_of if as_of is not None else self.as_of, **self.time_series_options)
+        df = processor.process()
+        encoder = FeatureEncoder(df, target_col=self.target_col, verbose=False, vocabularies=self.vocabularies)
+        df, _, _ = encoder.encode()
+        return df.reindex(columns=self.feature_names, fill_value=0)
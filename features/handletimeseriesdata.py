@@ -1,27 +1,128 @@
+import logging
+
 import pandas as pd
 import numpy as np
-from datetime import datetime
-import warnings
-warnings.filterwarnings('ignore')
+from utils.datetime_formats import DATETIME_FORMATS_ATTR, infer_datetime_format
+
+ITSM_DATETIME_MAPPING = {
+    'created_date': 'creation', 'resolved_date': 'resolution', 'closed_date': 'closure',
+    'first_response_date': 'first_response', 'last_updated_date': 'last_update',
+    'due_date': 'due', 'escalated_date': 'escalation'
+}
+AGE_COLUMNS = ('ticket_age_hours', 'ticket_age_days')
+YEAR_START_SUFFIX = '_business_days_from_year_start'
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_as_of(as_of=None) -> pd.Timestamp:
+    """The as-of time as a Timestamp; None means now. Resolve once per run so every chunk / stage agrees."""
+    return pd.Timestamp.now() if as_of is None else pd.Timestamp(as_of)
+
+
+def pipeline_as_of(as_of=None) -> pd.Timestamp:
+    """
+    As-of time of a feature pipeline run; None means today at midnight, so
+    default runs on the same day share stage-cache entries and DAG checkpoints.
+    """
+    return pd.Timestamp.now().floor('D') if as_of is None else pd.Timestamp(as_of)
+
 
 class TimeSeriesProcessor:
-    def __init__(self, df, datetime_columns=None, reference_date_col=None):
+    """
+    Temporal, ITSM and business-time feature engineering.
+
+    Business-day features use a NumPy business-day calendar built from `weekmask`
+    and `holidays`. `holidays` is either a list of dates applied to every ticket,
+    or a dict of region -> dates together with `region_col`, in which case each
+    ticket is counted against the calendar of its region (unlisted regions get
+    no holidays; so does every ticket when the frame has no `region_col`).
+    `business_hours` is the (start, end) hour of the working day.
+
+    Datetime columns are parsed exactly once, with a strftime format inferred
+    from a sample of each column (`datetime_formats` records them; pass a saved
+    mapping back in to skip detection and inference). `parse_failure_rates`
+    holds the share of non-null values per column that did not match.
+
+    Ticket ages and business days from year start are measured against
+    `as_of` (default: now, taken once at construction); pass it explicitly for
+    reproducible runs and backfills. reage() moves a processed frame to a later
+    as-of time by updating only those columns.
+    """
+    def __init__(self, df, datetime_columns=None, reference_date_col=None,
+                 holidays=None, region_col=None, weekmask='1111100', business_hours=(9, 17),
+                 datetime_formats=None, format_sample_size=100, as_of=None, verbose=True):
         self.df = df.copy()
-        self.datetime_columns = datetime_columns or self._auto_detect_datetime_columns()
+        self.verbose = verbose
+        self.datetime_formats = dict(datetime_formats or {})
+        self.format_sample_size = format_sample_size
+        self.parse_failure_rates = {}
+        self.datetime_columns = (
+            datetime_columns or list(self.datetime_formats) or self._auto_detect_datetime_columns()
+        )
         self.reference_date_col = reference_date_col
+        self.holidays = holidays or []
+        self.region_col = region_col
+        self.weekmask = weekmask
+        self.business_hours = business_hours
+        self.as_of = resolve_as_of(as_of)
+        if isinstance(self.holidays, dict) and not self.region_col:
+            raise ValueError("Regional holiday calendars require region_col.")
+        if isinstance(self.holidays, dict) and len(self.df.columns) and self.region_col not in self.df.columns:
+            logger.warning(f"Region column '{self.region_col}' not found; business days use no holidays.")
+
+    def calendar_options(self) -> dict:
+        """The business calendar as keyword arguments, e.g. to save with the fitted artifacts."""
+        return {'holidays': self.holidays, 'region_col': self.region_col, 'weekmask': self.weekmask,
+                'business_hours': list(self.business_hours)}
+
+    def _print(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def _loader_format(self, col):
+        """Format recorded by the loader that already parsed `col` (e.g. the columnar cache)."""
+        return self.df.attrs.get(DATETIME_FORMATS_ATTR, {}).get(col)
 
     def _auto_detect_datetime_columns(self):
         detected = []
         for col in self.df.columns:
-            if self.df[col].dtype == 'object':
+            if pd.api.types.is_datetime64_any_dtype(self.df[col]):
+                detected.append(col)
+                self.datetime_formats[col] = self._loader_format(col)
+            elif self.df[col].dtype == 'object':
                 try:
-                    pd.to_datetime(self.df[col].head(100), errors='raise')
+                    self.datetime_formats[col] = infer_datetime_format(self.df[col], self.format_sample_size)
                     detected.append(col)
-                except:
+                except (ValueError, TypeError, OverflowError):
                     continue
-        print("Auto-detected datetime columns:", detected)
+        self._print("Auto-detected datetime columns:", {col: self.datetime_formats[col] for col in detected})
         return detected
 
+    def _parse_datetime_columns(self):
+        """Parse every datetime column once with its recorded format and report failure rates."""
+        for col in self.datetime_columns:
+            raw = self.df[col]
+            if pd.api.types.is_datetime64_any_dtype(raw):
+                self.datetime_formats.setdefault(col, self._loader_format(col))
+                self.parse_failure_rates[col] = 0.0
+                continue
+            if col not in self.datetime_formats:
+                try:
+                    self.datetime_formats[col] = infer_datetime_format(raw, self.format_sample_size)
+                except (ValueError, TypeError, OverflowError):
+                    self.datetime_formats[col] = None
+
+            parsed = pd.to_datetime(raw, format=self.datetime_formats[col], errors='coerce')
+            non_null = raw.notna().sum()
+            failed = (parsed.isna() & raw.notna()).sum()
+            self.parse_failure_rates[col] = float(failed / non_null) if non_null else 0.0
+            self.df[col] = parsed
+
+        self._print("Datetime parse failure rates:")
+        for col, rate in self.parse_failure_rates.items():
+            self._print(f"  {col} [{self.datetime_formats[col]}]: {rate:.2%}")
+
     def _categorize_time_of_day(self, hour):
         if 6 <= hour < 12:
             return 1  # Morning
@@ -32,56 +133,83 @@ class TimeSeriesProcessor:
         else:
             return 4  # Night
 
-    def _extract_temporal_features(self, datetime_col):
-        print(f"  Extracting temporal features from {datetime_col}...")
-        self.df[datetime_col] = pd.to_datetime(self.df[datetime_col], errors='coerce')
-
-        df = self.df
-        df[f'{datetime_col}_year'] = df[datetime_col].dt.year
-        df[f'{datetime_col}_month'] = df[datetime_col].dt.month
-        df[f'{datetime_col}_day'] = df[datetime_col].dt.day
-        df[f'{datetime_col}_hour'] = df[datetime_col].dt.hour
-        df[f'{datetime_col}_minute'] = df[datetime_col].dt.minute
-        df[f'{datetime_col}_dayofweek'] = df[datetime_col].dt.dayofweek
-        df[f'{datetime_col}_dayofyear'] = df[datetime_col].dt.dayofyear
-        df[f'{datetime_col}_week'] = df[datetime_col].dt.isocalendar().week
-        df[f'{datetime_col}_quarter'] = df[datetime_col].dt.quarter
-
-        df[f'{datetime_col}_is_weekend'] = (df[datetime_col].dt.dayofweek >= 5).astype(int)
-        df[f'{datetime_col}_is_monday'] = (df[datetime_col].dt.dayofweek == 0).astype(int)
-        df[f'{datetime_col}_is_friday'] = (df[datetime_col].dt.dayofweek == 4).astype(int)
-
-        df[f'{datetime_col}_time_category'] = df[datetime_col].dt.hour.apply(self._categorize_time_of_day)
-
-        df[f'{datetime_col}_is_business_hours'] = (
-            (df[datetime_col].dt.hour >= 9) & (df[datetime_col].dt.hour < 17) & (df[datetime_col].dt.dayofweek < 5)
-        ).astype(int)
-
-        df[f'{datetime_col}_is_month_end'] = (
-            df[datetime_col].dt.day >= df[datetime_col].dt.days_in_month - 2
-        ).astype(int)
-
-        df[f'{datetime_col}_hour_sin'] = np.sin(2 * np.pi * df[datetime_col].dt.hour / 24)
-        df[f'{datetime_col}_hour_cos'] = np.cos(2 * np.pi * df[datetime_col].dt.hour / 24)
-        df[f'{datetime_col}_dayofweek_sin'] = np.sin(2 * np.pi * df[datetime_col].dt.dayofweek / 7)
-        df[f'{datetime_col}_dayofweek_cos'] = np.cos(2 * np.pi * df[datetime_col].dt.dayofweek / 7)
-        df[f'{datetime_col}_month_sin'] = np.sin(2 * np.pi * df[datetime_col].dt.month / 12)
-        df[f'{datetime_col}_month_cos'] = np.cos(2 * np.pi * df[datetime_col].dt.month / 12)
-
-    def _calculate_itsm_metrics(self):
-        print("\nCalculating ITSM-specific time metrics...")
-
-        mapping = {
-            'created_date': 'creation', 'resolved_date': 'resolution', 'closed_date': 'closure',
-            'first_response_date': 'first_response', 'last_updated_date': 'last_update',
-            'due_date': 'due', 'escalated_date': 'escalation'
+    @staticmethod
+    def _compact(values, dtype):
+        """Cast to a small integer dtype, or float32 when NaT left NaNs behind."""
+        values = np.asarray(values, dtype='float64')
+        return values.astype('float32') if np.isnan(values).any() else values.astype(dtype)
+
+    def _calendar_table(self, timestamps: pd.DatetimeIndex):
+        """Every derived temporal feature, computed once per unique timestamp."""
+        year = timestamps.year.to_numpy(dtype='float64')
+        month = timestamps.month.to_numpy(dtype='float64')
+        day = timestamps.day.to_numpy(dtype='float64')
+        hour = timestamps.hour.to_numpy(dtype='float64')
+        dayofweek = timestamps.dayofweek.to_numpy(dtype='float64')
+        week = timestamps.isocalendar().week.to_numpy(dtype='float64', na_value=np.nan)
+
+        time_category_by_hour = np.array([self._categorize_time_of_day(h) for h in range(24)], dtype='int8')
+        time_category = np.full(len(timestamps), self._categorize_time_of_day(np.nan), dtype='int8')
+        known = ~np.isnan(hour)
+        time_category[known] = time_category_by_hour[hour[known].astype(int)]
+
+        return {
+            'year': self._compact(year, 'int16'),
+            'month': self._compact(month, 'int8'),
+            'day': self._compact(day, 'int8'),
+            'hour': self._compact(hour, 'int8'),
+            'minute': self._compact(timestamps.minute, 'int8'),
+            'dayofweek': self._compact(dayofweek, 'int8'),
+            'dayofyear': self._compact(timestamps.dayofyear, 'int16'),
+            'week': self._compact(week, 'int8'),
+            'quarter': self._compact(timestamps.quarter, 'int8'),
+            'is_weekend': (dayofweek >= 5).astype('int8'),
+            'is_monday': (dayofweek == 0).astype('int8'),
+            'is_friday': (dayofweek == 4).astype('int8'),
+            'time_category': time_category,
+            'is_business_hours': ((hour >= 9) & (hour < 17) & (dayofweek < 5)).astype('int8'),
+            'is_month_end': (day >= timestamps.days_in_month.to_numpy(dtype='float64') - 2).astype('int8'),
+            'hour_sin': np.sin(2 * np.pi * hour / 24).astype('float32'),
+            'hour_cos': np.cos(2 * np.pi * hour / 24).astype('float32'),
+            'dayofweek_sin': np.sin(2 * np.pi * dayofweek / 7).astype('float32'),
+            'dayofweek_cos': np.cos(2 * np.pi * dayofweek / 7).astype('float32'),
+            'month_sin': np.sin(2 * np.pi * month / 12).astype('float32'),
+            'month_cos': np.cos(2 * np.pi * month / 12).astype('float32'),
         }
 
-        available = {
+    def _extract_temporal_features(self, datetime_col):
+        """
+        Factorize the column, build the calendar table over its unique timestamps
+        (plus one NaT slot when needed) and scatter each feature back by code.
+        """
+        self._print(f"  Extracting temporal features from {datetime_col}...")
+
+        codes, uniques = pd.factorize(self.df[datetime_col])
+        uniques = pd.DatetimeIndex(uniques)
+        if (codes == -1).any():
+            uniques = uniques.append(pd.DatetimeIndex([pd.NaT]))
+            codes = np.where(codes == -1, len(uniques) - 1, codes)
+
+        table = self._calendar_table(uniques)
+        features = {f'{datetime_col}_{name}': values.take(codes) for name, values in table.items()}
+        self.df = pd.concat([self.df, pd.DataFrame(features, index=self.df.index)], axis=1)
+
+    def _available_itsm_columns(self):
+        return {
             label: col for col in self.datetime_columns
-            for key, label in mapping.items() if key in col.lower() or label in col.lower()
+            for key, label in ITSM_DATETIME_MAPPING.items() if key in col.lower() or label in col.lower()
         }
 
+    def _reference_column(self, available):
+        """reference_date_col may name the column itself or its ITSM label (e.g. 'creation')."""
+        if self.reference_date_col in available:
+            return available[self.reference_date_col]
+        return self.reference_date_col if self.reference_date_col in self.datetime_columns else None
+
+    def _calculate_itsm_metrics(self):
+        self._print("\nCalculating ITSM-specific time metrics...")
+
+        available = self._available_itsm_columns()
         df = self.df
 
         if 'creation' in available and 'resolution' in available:
@@ -110,54 +238,158 @@ class TimeSeriesProcessor:
                     0
                 )
 
-        if self.reference_date_col and self.reference_date_col in available:
-            now = datetime.now()
+        reference_col = self._reference_column(available)
+        if reference_col is not None:
             df['ticket_age_hours'] = (
-                now - df[available[self.reference_date_col]]
+                self.as_of - df[reference_col]
             ).dt.total_seconds() / 3600
             df['ticket_age_days'] = df['ticket_age_hours'] / 24
 
+    def _calendar_groups(self, df=None):
+        """Yield (row mask, np.busdaycalendar) pairs covering every row of `df` (default: self.df)."""
+        df = self.df if df is None else df
+        if not isinstance(self.holidays, dict):
+            yield np.ones(len(df), dtype=bool), np.busdaycalendar(weekmask=self.weekmask, holidays=self.holidays)
+            return
+        if self.region_col not in df.columns:
+            yield np.ones(len(df), dtype=bool), np.busdaycalendar(weekmask=self.weekmask)
+            return
+
+        regions = df[self.region_col].astype(object).to_numpy()
+        default_mask = ~np.isin(regions, list(self.holidays))
+        if default_mask.any():
+            yield default_mask, np.busdaycalendar(weekmask=self.weekmask)
+        for region, region_holidays in self.holidays.items():
+            mask = regions == region
+            if mask.any():
+                yield mask, np.busdaycalendar(weekmask=self.weekmask, holidays=region_holidays)
+
+    def _business_days_between(self, start, end, df=None):
+        """Vectorized np.busday_count over datetime64[D] arrays; NaN where either end is NaT."""
+        out = np.full(len(end), np.nan)
+        valid = ~(np.isnat(start) | np.isnat(end))
+        for mask, calendar in self._calendar_groups(df):
+            rows = mask & valid
+            out[rows] = np.busday_count(start[rows], end[rows], busdaycal=calendar)
+        return out
+
+    def _business_hours_between(self, start, end):
+        """
+        Business hours elapsed between two datetime64[ns] arrays:
+        full business days in between plus the partial first and last day,
+        each clipped to the business-hours window.
+        """
+        open_hour, close_hour = self.business_hours
+        start_day, end_day = start.astype('datetime64[D]'), end.astype('datetime64[D]')
+        out = np.full(len(end), np.nan)
+        valid = ~(np.isnat(start) | np.isnat(end))
+
+        def hours_into_window(ts, day, is_busday):
+            hours = (ts - day.astype('datetime64[ns]')) / np.timedelta64(1, 'h')
+            return (np.clip(hours, open_hour, close_hour) - open_hour) * is_busday
+
+        for mask, calendar in self._calendar_groups():
+            rows = mask & valid
+            s_day, e_day = start_day[rows], end_day[rows]
+            full_days = np.busday_count(s_day, e_day, busdaycal=calendar)
+            s_part = hours_into_window(start[rows], s_day, np.is_busday(s_day, busdaycal=calendar))
+            e_part = hours_into_window(end[rows], e_day, np.is_busday(e_day, busdaycal=calendar))
+            out[rows] = full_days * (close_hour - open_hour) - s_part + e_part
+        return out
+
     def _calculate_business_features(self):
-        print("\nCalculating business time features...")
+        self._print("\nCalculating business time features...")
         df = self.df
-        year_start = pd.Timestamp(f'{datetime.now().year}-01-01')
 
         for col in self.datetime_columns:
-            df[f'{col}_business_days_from_year_start'] = df[col].apply(
-                lambda x: np.busday_count(year_start.date(), x.date()) if pd.notna(x) else np.nan
-            )
+            df[f'{col}{YEAR_START_SUFFIX}'] = self._business_days_from_year_start(
+                df[col].to_numpy(dtype='datetime64[D]'), self.as_of)
             df[f'{col}_is_peak_hours'] = df[col].dt.hour.isin([9, 10, 11, 14, 15, 16]).astype(int)
 
+        available = self._available_itsm_columns()
+        if 'creation' in available:
+            created = df[available['creation']].to_numpy(dtype='datetime64[ns]')
+            if 'due' in available:
+                df['business_hours_to_due'] = self._business_hours_between(
+                    created, df[available['due']].to_numpy(dtype='datetime64[ns]'))
+            if 'resolution' in available:
+                df['business_hours_to_resolution'] = self._business_hours_between(
+                    created, df[available['resolution']].to_numpy(dtype='datetime64[ns]'))
+
+    def _business_days_from_year_start(self, days, as_of, df=None):
+        """Business days from Jan 1 of the as-of year to each datetime64[D] value (negative before it)."""
+        year_start = np.datetime64(f'{as_of.year}-01-01', 'D')
+        business_days = self._business_days_between(np.full(len(days), year_start), days, df)
+        return business_days.astype('int64') if not np.isnan(business_days).any() else business_days
+
+    @staticmethod
+    def _dates(df, col):
+        """datetime64[D] values of `col`, from the column itself or its year / month / day features."""
+        if col in df.columns and pd.api.types.is_datetime64_any_dtype(df[col]):
+            return df[col].to_numpy(dtype='datetime64[D]')
+        parts = {name: f'{col}_{name}' for name in ('year', 'month', 'day')}
+        if not set(parts.values()) <= set(df.columns):
+            raise ValueError(f"Cannot re-age '{col}{YEAR_START_SUFFIX}': no '{col}' datetimes or calendar features.")
+        dates = pd.to_datetime(pd.DataFrame({name: df[part] for name, part in parts.items()}), errors='coerce')
+        return dates.to_numpy(dtype='datetime64[D]')
+
+    def reage(self, as_of, df=None):
+        """
+        Move features computed at self.as_of to `as_of` without recomputing
+        the rest: ticket ages shift by the elapsed time and, only when the year
+        changes, business days from year start are recounted against the new
+        anchor (from the datetimes, or their year / month / day features). Works
+        on the processed frame, or on `df` holding those feature columns (plus
+        region_col when regional holidays are used).
+        """
+        df = self.df if df is None else df
+        as_of = resolve_as_of(as_of)
+        if AGE_COLUMNS[0] in df.columns:
+            df[AGE_COLUMNS[0]] = df[AGE_COLUMNS[0]] + (as_of - self.as_of) / pd.Timedelta(hours=1)
+            df[AGE_COLUMNS[1]] = df[AGE_COLUMNS[0]] / 24
+
+        if as_of.year != self.as_of.year:
+            for col in self.datetime_columns:
+                if f'{col}{YEAR_START_SUFFIX}' in df.columns:
+                    df[f'{col}{YEAR_START_SUFFIX}'] = self._business_days_from_year_start(
+                        self._dates(df, col), as_of, df)
+
+        self.as_of = as_of
+        if df is self.df:
+            self._print(f"Re-aged {len(df)} rows to {as_of}")
+        return df
+
     def process(self):
-        print("=" * 60)
-        print("TIME SERIES DATA PROCESSING FOR ITSM SLA OPTIMIZATION")
-        print("=" * 60)
+        self._print("=" * 60)
+        self._print("TIME SERIES DATA PROCESSING FOR ITSM SLA OPTIMIZATION")
+        self._print("=" * 60)
 
+        self._parse_datetime_columns()
         for col in self.datetime_columns:
             self._extract_temporal_features(col)
 
         self._calculate_itsm_metrics()
         self._calculate_business_features()
 
-        print("\n✓ Time series data processing completed!")
-        print(f"✓ Final dataset shape: {self.df.shape}")
+        self._print("\n✓ Time series data processing completed!")
+        self._print(f"✓ Final dataset shape: {self.df.shape}")
         return self.df
 
     def summarize_new_features(self, original_columns):
-        print("\n=" * 25)
-        print("TIME SERIES PROCESSING RESULTS")
-        print("=" * 50)
+        self._print("\n=" * 25)
+        self._print("TIME SERIES PROCESSING RESULTS")
+        self._print("=" * 50)
 
         new_cols = set(self.df.columns) - set(original_columns)
-        print(f"New features created ({len(new_cols)}):")
+        self._print(f"New features created ({len(new_cols)}):")
         for col in sorted(new_cols):
-            print(f"  - {col}")
+            self._print(f"  - {col}")
 
-        print("\nSample of new features:")
+        self._print("\nSample of new features:")
         time_cols = [col for col in self.df.columns if any(k in col.lower() for k in ['time', 'hour', 'sla', 'age'])]
-        print(self.df[time_cols[:10]].head())
+        self._print(self.df[time_cols[:10]].head())
 
-        print("\nSummary of time metrics:")
+        self._print("\nSummary of time metrics:")
         key_metrics = [col for col in self.df.columns if any(k in col.lower() for k in ['resolution_time', 'response_time', 'sla_breach', 'ticket_age'])]
 
 
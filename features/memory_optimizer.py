@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_object_dtype
+
+
+class MemoryOptimizer:
+    """
+    Shrinks a frame's dtypes without changing its values.
+
+    Object columns with at most `categorical_threshold` * rows distinct values become
+    `category`, integers are downcast to the smallest width that holds their range,
+    and floats become float32 only when every value survives the round trip
+    exactly (float_rtol=0, the default) or, with float_rtol > 0, within that
+    relative tolerance (which must exceed float32's ~6e-8 rounding to matter).
+    Large IDs, epoch timestamps and money amounts therefore stay float64.
+    optimize() keeps a per-column before/after byte report in `report_`.
+    """
+    def __init__(self, categorical_threshold=0.5, float_rtol=0.0, exclude=(), verbose=True):
+        self.categorical_threshold = categorical_threshold
+        self.float_rtol = float_rtol
+        self.exclude = set(exclude)
+        self.verbose = verbose
+        self.report_ = pd.DataFrame()
+
+    def _target_dtype(self, series):
+        """Smallest safe dtype for `series`, or None to leave it as is."""
+        if is_bool_dtype(series.dtype):
+            return None
+        if is_object_dtype(series.dtype):
+            if series.nunique() <= self.categorical_threshold * len(series):
+                return 'category'
+            return None
+        if is_integer_dtype(series.dtype) and not isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            if series.empty:
+                return None
+            # signed only, so later arithmetic on the column cannot wrap around
+            dtype = pd.to_numeric(series, downcast='integer').dtype
+            return dtype if dtype != series.dtype else None
+        if series.dtype == 'float64':
+            values = series.to_numpy()
+            with np.errstate(over='ignore'):
+                round_trip = values.astype('float32').astype('float64')
+            if self.float_rtol:
+                safe = np.allclose(values, round_trip, rtol=self.float_rtol, atol=0, equal_nan=True)
+            else:
+                safe = np.array_equal(values, round_trip, equal_nan=True)
+            if safe:
+                return 'float32'
+        return None
+
+    def optimize(self, df: pd.DataFrame) -> pd.DataFrame:
+        before_dtypes = df.dtypes
+        before = df.memory_usage(index=False, deep=True)
+        dtypes = {}
+        for col in df.columns:
+            if col in self.exclude:
+                continue
+            dtype = self._target_dtype(df[col])
+            if dtype is not None:
+                dtypes[col] = dtype
+
+        df = df.astype(dtypes)
+        after = df.memory_usage(index=False, deep=True)
+        self.report_ = pd.DataFrame({
+            'Column': df.columns,
+            'Before Dtype': before_dtypes.astype(str).to_numpy(),
+            'After Dtype': df.dtypes.astype(str).to_numpy(),
+            'Before Bytes': before.to_numpy(),
+            'After Bytes': after.to_numpy(),
+        }).sort_values(by='Before Bytes', ascending=False, ignore_index=True)
+
+        if self.verbose:
+            changed = self.report_[self.report_['Before Dtype'] != self.report_['After Dtype']]
+            print(f"\n Memory optimization: {len(changed)} of {df.shape[1]} columns downcast")
+            if not changed.empty:
+                print(changed.to_string(index=False))
+            print(f" Total: {before.sum() / 1e6:.1f} MB -> {after.sum() / 1e6:.1f} MB")
+        return df
@@ -0,0 +1,237 @@
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from features.Missing_null_pipeline import DataProcessor
+from features.handletimeseriesdata import TimeSeriesProcessor, resolve_as_of
+from features.Encodingfeatures import FeatureEncoder
+from features.leakageandsmote import LeakyFeatureRemover
+
+
+class QuantileSketch:
+    """
+    Bounded uniform sample of a numeric stream (bottom-k by random priority),
+    used for approximate medians/quantiles without holding the column.
+    """
+    def __init__(self, size=10_000, random_state=42):
+        self.size = size
+        self.rng = np.random.default_rng(random_state)
+        self.values = np.empty(0)
+        self.priorities = np.empty(0)
+        self.count = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.values = np.concatenate([self.values, values])
+        self.priorities = np.concatenate([self.priorities, self.rng.random(len(values))])
+        if len(self.values) > self.size:
+            keep = np.argpartition(self.priorities, self.size)[:self.size]
+            self.values, self.priorities = self.values[keep], self.priorities[keep]
+
+    def quantile(self, q):
+        return float(np.quantile(self.values, q)) if len(self.values) else np.nan
+
+
+class CappedCounter:
+    """
+    Value counts for a categorical stream, pruned to the `capacity` most frequent
+    values whenever it doubles past it. `truncated` marks approximate counts.
+    """
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self.counts = Counter()
+        self.truncated = False
+
+    def update(self, series):
+        self.counts.update(series.dropna().astype(str).value_counts().to_dict())
+        if len(self.counts) > 2 * self.capacity:
+            self.counts = Counter(dict(self.counts.most_common(self.capacity)))
+            self.truncated = True
+
+    def mode(self):
+        """Most frequent value; ties go to the smallest, as in pandas Series.mode()[0]."""
+        if not self.counts:
+            return None
+        top = max(self.counts.values())
+        return min(value for value, count in self.counts.items() if count == top)
+
+    def vocabulary(self):
+        return sorted(self.counts)
+
+
+class StreamingFeaturePipeline:
+    """
+    Out-of-core version of the feature pipeline for exports that do not fit in RAM.
+
+    Pass 1 streams the raw CSV in chunks and collects what each stage needs:
+    null ratios, categorical modes and vocabularies (CappedCounter) and
+    approximate numeric medians (QuantileSketch); the null statistics become a
+    fitted DataProcessor. Pass 2 streams it again, runs DataProcessor.transform,
+    TimeSeriesProcessor, FeatureEncoder (with the frozen vocabularies) and leak
+    removal per chunk, and appends each chunk to a Parquet file. Peak memory is
+    bounded by `chunksize`.
+
+    Differences from the in-memory pipeline: datetime columns are encoded as
+    epoch seconds (same ordering as the in-memory label codes of their ISO
+    strings) instead of a global label vocabulary, and SMOTE is not applied;
+    resample when training on the written features. `as_of` is resolved once,
+    so every chunk's time-dependent features share one reference time.
+    """
+    def __init__(self, target_col='SLA Breach', chunksize=100_000, null_threshold=70,
+                 sketch_size=10_000, max_vocab_size=100_000, random_state=42, verbose=True, as_of=None,
+                 **time_series_options):
+        self.target_col = target_col
+        self.chunksize = chunksize
+        self.null_threshold = null_threshold
+        self.sketch_size = sketch_size
+        self.max_vocab_size = max_vocab_size
+        self.random_state = random_state
+        self.verbose = verbose
+        self.time_series_options = time_series_options
+        self.as_of = resolve_as_of(as_of)
+
+        self.n_rows = 0
+        self.object_columns = []
+        self.dropped_columns = []
+        self.fill_values = {}
+        self.datetime_formats = {}
+        self.vocabularies = {}
+        self.leaky_columns = []
+        self.null_handler = None
+
+    def iter_chunks(self, path, **read_csv_kwargs):
+        """Yield the raw export chunk by chunk."""
+        yield from pd.read_csv(path, chunksize=self.chunksize, **read_csv_kwargs)
+
+    # ---------------------------------------------------------------- pass 1
+    def fit(self, path):
+        start = time.perf_counter()
+        null_counts = None
+        counters, sketches = {}, {}
+
+        for i, chunk in enumerate(self.iter_chunks(path)):
+            if i == 0:
+                self.object_columns = chunk.select_dtypes(include=['object']).columns.tolist()
+                processor = TimeSeriesProcessor(chunk[self.object_columns])
+                self.datetime_formats = processor.datetime_formats
+                counters = {col: CappedCounter(self.max_vocab_size) for col in self.object_columns}
+                sketches = {
+                    col: QuantileSketch(self.sketch_size, self.random_state)
+                    for col in chunk.select_dtypes(include=['int64', 'float64']).columns
+                }
+                null_counts = pd.Series(0, index=chunk.columns)
+
+            self.n_rows += len(chunk)
+            null_counts = null_counts.add(chunk.isnull().sum(), fill_value=0)
+            for col, counter in counters.items():
+                counter.update(chunk[col])
+            for col, sketch in sketches.items():
+                sketch.update(chunk[col])
+
+        null_percentage = null_counts / max(self.n_rows, 1) * 100
+        self.dropped_columns = null_percentage[null_percentage > self.null_threshold].index.tolist()
+        self.datetime_formats = {
+            col: fmt for col, fmt in self.datetime_formats.items() if col not in self.dropped_columns
+        }
+
+        # every kept column gets a fill value, as in DataProcessor.fit: a column with no
+        # nulls in the export can still have them in the tickets scored later
+        for col in null_percentage.index:
+            if col in self.dropped_columns:
+                continue
+            if col == 'Escalation Level':
+                value = 'Unknown'
+            elif col in counters:
+                value = counters[col].mode()
+            elif col in sketches:
+                value = sketches[col].quantile(0.5)
+            else:
+                continue
+            if pd.notna(value):
+                self.fill_values[col] = value
+
+        for col, counter in counters.items():
+            if col in self.dropped_columns or col in self.datetime_formats or col == self.target_col:
+                continue
+            vocabulary = set(counter.vocabulary())
+            if col in self.fill_values:
+                vocabulary.add(str(self.fill_values[col]))
+            self.vocabularies[col] = sorted(vocabulary)
+            if counter.truncated and self.verbose:
+                print(f" Vocabulary of '{col}' capped at {self.max_vocab_size} most frequent values.")
+
+        self.null_handler = DataProcessor(threshold=self.null_threshold, verbose=False)
+        self.null_handler.dropped_columns_ = self.dropped_columns
+        self.null_handler.fill_values_ = self.fill_values
+
+        if self.verbose:
+            print(f" Pass 1: {self.n_rows} rows in {time.perf_counter() - start:.1f}s; "
+                  f"dropping {self.dropped_columns}; filling {list(self.fill_values)}")
+        return self
+
+    # ---------------------------------------------------------------- pass 2
+    @staticmethod
+    def _stable_dtypes(df):
+        """
+        Widen numeric columns so every chunk writes the same Parquet schema
+        (e.g. calendar features come out int8 without NaT and float32 with it).
+        """
+        widened = {}
+        for col, dtype in df.dtypes.items():
+            if pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+                continue
+            widened[col] = 'float32' if dtype.itemsize <= 2 or dtype == 'float32' else 'float64'
+        return df.astype(widened)
+
+    def transform_chunk(self, chunk):
+        chunk = self.null_handler.transform(chunk)
+        processor = TimeSeriesProcessor(
+            chunk, reference_date_col='created_date', datetime_formats=self.datetime_formats,
+            as_of=self.as_of, verbose=False, **self.time_series_options
+        )
+        chunk = processor.process()
+        for col in processor.datetime_columns:
+            chunk[col] = (chunk[col] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+
+        encoder = FeatureEncoder(chunk, target_col=self.target_col, verbose=False,
+                                 vocabularies=self.vocabularies)
+        chunk, _, _ = encoder.encode()
+
+        remover = LeakyFeatureRemover(target_col=self.target_col, verbose=False)
+        X, y = remover.fit_transform(chunk)
+        self.leaky_columns = remover.leaky_columns_
+        return self._stable_dtypes(X), y
+
+    def run(self, path, output_path):
+        """Fit on `path` (pass 1), then transform it chunk by chunk into `output_path` (pass 2)."""
+        if self.n_rows == 0:
+            self.fit(path)
+
+        start = time.perf_counter()
+        dtypes = {col: object for col in self.object_columns}
+        writer, rows = None, 0
+        try:
+            for chunk in self.iter_chunks(path, dtype=dtypes):
+                X, y = self.transform_chunk(chunk)
+                table = pa.Table.from_pandas(X.assign(**{self.target_col: y.to_numpy()}), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+                rows += len(X)
+                if self.verbose:
+                    print(f" Pass 2: {rows}/{self.n_rows} rows written")
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if self.verbose:
+            elapsed = time.perf_counter() - start
+            print(f" Streaming features written to {output_path} "
+                  f"({rows} rows, {rows / max(elapsed, 1e-9):.0f} rows/sec)")
+        return output_path
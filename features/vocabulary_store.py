@@ -0,0 +1,177 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_CODE = -1
+
+
+def _as_strings(values) -> np.ndarray:
+    return np.asarray(pd.Series(values, dtype=object).astype(str), dtype=object)
+
+
+def _hash_strings(values) -> np.ndarray:
+    """Deterministic 64-bit hashes of the string form of each value."""
+    return pd.util.hash_array(_as_strings(values), categorize=True)
+
+
+class VocabularyStore:
+    """
+    Array-backed, memory-mapped vocabularies for categorical encoding.
+
+    Each column's vocabulary is a sorted string table (codes match LabelEncoder's
+    classes_ order) plus an open-addressing hash index over 64-bit string hashes.
+    All columns share four files (slots.npy, hashes.npy, offsets.npy,
+    strings.bin) opened with mmap, so loading reads only meta.json no matter how
+    large the vocabularies are. lookup() maps a whole batch in vectorized probes,
+    confirms each hash match against the stored string (so a colliding unseen
+    value is not given a real code) and returns UNKNOWN_CODE (-1) for unseen
+    values instead of raising.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'meta.json', 'r') as f:
+            self.meta = json.load(f)
+        self._slots = np.load(self.path / 'slots.npy', mmap_mode='r')
+        self._hashes = np.load(self.path / 'hashes.npy', mmap_mode='r')
+        self._offsets = np.load(self.path / 'offsets.npy', mmap_mode='r')
+        self._strings = np.memmap(self.path / 'strings.bin', dtype=np.uint8, mode='r') \
+            if (self.path / 'strings.bin').stat().st_size else np.empty(0, dtype=np.uint8)
+        self._categories = {}
+
+    # ---------------------------------------------------------------- build
+    @staticmethod
+    def _build_index(hashes: np.ndarray):
+        """Vectorized linear-probing insert; returns (slots, max probe length)."""
+        size = 8
+        while size < 2 * len(hashes):
+            size *= 2
+        mask = np.uint64(size - 1)
+        slots = np.full(size, UNKNOWN_CODE, dtype=np.int32)
+        pending = np.arange(len(hashes))
+        positions = (hashes & mask).astype(np.int64)
+        probe = 0
+        while len(pending):
+            free = slots[positions] == UNKNOWN_CODE
+            # among keys that want the same free slot, the first one wins this round
+            _, first = np.unique(positions[free], return_index=True)
+            winners = np.flatnonzero(free)[first]
+            slots[positions[winners]] = pending[winners]
+            keep = np.ones(len(pending), dtype=bool)
+            keep[winners] = False
+            pending, positions = pending[keep], (positions[keep] + 1) % size
+            probe += 1 if len(pending) else 0
+        return slots, probe
+
+    @classmethod
+    def build(cls, vocabularies: dict, path):
+        """Write {column: values} to `path` and return the memory-mapped store."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        meta, slot_parts, hash_parts, offset_parts, string_parts = {}, [], [], [], []
+        slot_start = hash_start = string_start = 0
+
+        for col, values in vocabularies.items():
+            strings = sorted({str(v) for v in values})
+            hashes = _hash_strings(strings)
+            if len(np.unique(hashes)) != len(hashes):
+                raise ValueError(f"Hash collision in the vocabulary of '{col}'.")
+            slots, max_probe = cls._build_index(hashes)
+            encoded = [s.encode('utf-8') for s in strings]
+            lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+
+            meta[col] = {
+                'size': len(strings),
+                'slots': [slot_start, slot_start + len(slots)],
+                'codes': [hash_start, hash_start + len(strings)],
+                'max_probe': max_probe,
+            }
+            slot_parts.append(slots)
+            hash_parts.append(hashes)
+            offset_parts.append(string_start + np.concatenate([[0], np.cumsum(lengths)])[:-1])
+            string_parts.append(b''.join(encoded))
+            slot_start += len(slots)
+            hash_start += len(strings)
+            string_start += int(lengths.sum())
+
+        total_offsets = np.concatenate(offset_parts + [np.array([string_start])]).astype(np.int64)
+        np.save(path / 'slots.npy', np.concatenate(slot_parts) if slot_parts else np.empty(0, np.int32))
+        np.save(path / 'hashes.npy', np.concatenate(hash_parts) if hash_parts else np.empty(0, np.uint64))
+        np.save(path / 'offsets.npy', total_offsets)
+        with open(path / 'strings.bin', 'wb') as f:
+            f.write(b''.join(string_parts))
+        with open(path / 'meta.json', 'w') as f:
+            json.dump(meta, f)
+        return cls(path)
+
+    @classmethod
+    def from_label_encoders(cls, encoders: dict, path):
+        """Convert a {column: fitted LabelEncoder} dict (e.g. the old pickles) to a store."""
+        return cls.build({col: encoder.classes_ for col, encoder in encoders.items()}, path)
+
+    # --------------------------------------------------------------- lookup
+    @property
+    def columns(self):
+        return list(self.meta)
+
+    def __contains__(self, col):
+        return col in self.meta
+
+    def size(self, col) -> int:
+        return self.meta[col]['size']
+
+    def lookup(self, col, values) -> np.ndarray:
+        """Codes of `values` in the column's sorted table; UNKNOWN_CODE where unseen."""
+        info = self.meta[col]
+        slots = self._slots[info['slots'][0]:info['slots'][1]]
+        known_hashes = self._hashes[info['codes'][0]:info['codes'][1]]
+        strings = _as_strings(values)
+        hashes = pd.util.hash_array(strings, categorize=True)
+
+        codes = np.full(len(hashes), UNKNOWN_CODE, dtype=np.int32)
+        if not info['size']:
+            return codes
+        mask = np.uint64(len(slots) - 1)
+        pending = np.arange(len(hashes))
+        positions = (hashes & mask).astype(np.int64)
+        for _ in range(info['max_probe'] + 1):
+            candidate = slots[positions]
+            occupied = candidate != UNKNOWN_CODE
+            match = occupied.copy()
+            match[occupied] = known_hashes[candidate[occupied]] == hashes[pending[occupied]]
+            codes[pending[match]] = candidate[match]
+            keep = occupied & ~match
+            pending, positions = pending[keep], (positions[keep] + 1) % len(slots)
+            if not len(pending):
+                break
+        return self._verify(col, strings, codes)
+
+    def _verify(self, col, strings, codes) -> np.ndarray:
+        """Reset codes whose stored string differs from the value (a hash collision) to UNKNOWN_CODE."""
+        matched = np.flatnonzero(codes != UNKNOWN_CODE)
+        if not len(matched):
+            return codes
+        start = self.meta[col]['codes'][0]
+        # equal strings always get the same code, so each distinct value is compared once
+        inverse, uniques = pd.factorize(strings[matched])
+        first = np.unique(inverse, return_index=True)[1]
+        collided = np.zeros(len(uniques), dtype=bool)
+        for i, (value, row) in enumerate(zip(uniques, matched[first])):
+            code = start + int(codes[row])
+            stored = bytes(self._strings[self._offsets[code]:self._offsets[code + 1]])
+            collided[i] = stored != value.encode('utf-8')
+        codes[matched[collided[inverse]]] = UNKNOWN_CODE
+        return codes
+
+    def categories(self, col) -> list:
+        """Decode the column's sorted string table (only needed for small vocabularies)."""
+        if col in self._categories:
+            return self._categories[col]
+        start, stop = self.meta[col]['codes']
+        bounds = np.asarray(self._offsets[start:stop + 1])
+        raw = bytes(self._strings[bounds[0]:bounds[-1]])
+        self._categories[col] = [
+            raw[a - bounds[0]:b - bounds[0]].decode('utf-8') for a, b in zip(bounds[:-1], bounds[1:])
+        ]
+        return self._categories[col]
@@ -1,16 +1,62 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import get_scorer
+import xgboost as xgb
 from xgboost import XGBClassifier
-from sklearn.model_selection import GridSearchCV
+from sklearn.model_selection import GridSearchCV, ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.utils import resample
+from models.xgb_external_memory import ParquetBatchIter
 
 class ModelTrainer:
-    def __init__(self, model_type='rf', random_state=42, verbose=True):
+    """
+    Tunes and fits an RF or XGB classifier.
+
+    train_with_gridsearch() fits every grid point on every fold.
+    train_with_halving() runs successive halving over the same grid: all
+    candidates are scored on a small stratified subsample, the best 1/`factor`
+    move on to a `factor`-times larger one, and so on up to the full training
+    set. XGB candidates early-stop on an inner split held out from each
+    training fold (`early_stopping_fraction`) and are scored on the untouched
+    validation fold, so the ranking is not biased towards configs that fit the
+    scoring fold; the refit uses the boosting rounds they needed. The search stops early when a fit-count
+    or wall-clock budget runs out; every evaluation is recorded in
+    `search_trace_`.
+
+    XGB always uses the `hist` tree method. With `enable_categorical=True` it
+    splits pandas `category` columns natively, so it can train on
+    prepare_native_categorical() output instead of the one-hot/label-encoded
+    frame. train_external_memory() trains from chunked Parquet feature files
+    through an ExtMemQuantileDMatrix for data that does not fit in RAM.
+
+    `sampler` (e.g. SMOTEHandler(engine='approximate')) makes every search fit
+    a resample-then-train pipeline, so SMOTE runs lazily on each training fold
+    instead of once on the whole training set; grid keys get a 'model__' prefix.
+
+    `tracker` (a started AsyncRunLogger) receives every CV score, the best
+    params and the search time, queued without blocking the search.
+    """
+    def __init__(self, model_type='rf', random_state=42, verbose=True, enable_categorical=False, sampler=None,
+                 tracker=None):
         self.model_type = model_type.lower()
         self.random_state = random_state
         self.verbose = verbose
+        self.enable_categorical = enable_categorical
+        self.sampler = sampler
+        self.tracker = tracker
         self.model = None
         self.best_params = {}
+        self.search_trace_ = pd.DataFrame()
 
     def get_param_grid(self):
+        grid = self._base_param_grid()
+        return {f'model__{k}': v for k, v in grid.items()} if self.sampler is not None else grid
+
+    def _base_param_grid(self):
         if self.model_type == 'rf':
             return {
                 'n_estimators': [100, 200],
@@ -33,14 +79,31 @@ class ModelTrainer:
             raise ValueError(f"Unsupported model type: {self.model_type}")
 
     def get_model(self):
+        model = self._base_model()
+        return self.sampler.pipeline(model) if self.sampler is not None else model
+
+    def _base_model(self):
         if self.model_type == 'rf':
             return RandomForestClassifier(random_state=self.random_state)
         elif self.model_type == 'xgb':
-            return XGBClassifier(random_state=self.random_state, use_label_encoder=False, eval_metric='logloss')
+            return XGBClassifier(random_state=self.random_state, use_label_encoder=False, eval_metric='logloss',
+                                 tree_method='hist', enable_categorical=self.enable_categorical)
         else:
             raise ValueError(f"Unsupported model type: {self.model_type}")
 
+    def _track_search(self, search, scoring, cv_scores, best_score, seconds, n_rows):
+        if self.tracker is None:
+            return
+        prefix = f"{self.model_type}."
+        for step, score in enumerate(cv_scores):
+            self.tracker.log_metric(f"{prefix}cv_{scoring}", score, step=step)
+        self.tracker.log_metrics({f'best_cv_{scoring}': best_score, 'search_seconds': seconds,
+                                  'n_candidates_evaluated': len(cv_scores)}, prefix=prefix)
+        self.tracker.log_params({'search': search, 'train_rows': n_rows, **self.best_params},
+                                prefix=prefix)
+
     def train_with_gridsearch(self, X_train, y_train, cv=3, scoring='f1', n_jobs=-1):
+        start = time.perf_counter()
         param_grid = self.get_param_grid()
         model = self.get_model()
 
@@ -49,8 +112,148 @@ class ModelTrainer:
 
         self.model = grid_search.best_estimator_
         self.best_params = grid_search.best_params_
+        self._track_search('grid', scoring, grid_search.cv_results_['mean_test_score'],
+                           grid_search.best_score_, time.perf_counter() - start, len(y_train))
 
         if self.verbose:
             print(f"Best Params for {self.model_type.upper()}: {self.best_params}")
 
-        return self.model
\ No newline at end of file
+        return self.model
+
+    def _fit_candidate(self, params, X_train, y_train, early_stopping_rounds, early_stopping_fraction):
+        """
+        Fit one candidate on a training fold. XGB early-stops on a stratified
+        `early_stopping_fraction` of that fold, never on the fold it is scored on.
+        """
+        model = clone(self.get_model()).set_params(**params)
+        prefix = 'model__' if self.sampler is not None else ''
+        if self.model_type == 'xgb' and early_stopping_rounds:
+            stratify = y_train if y_train.value_counts().min() >= 2 else None
+            X_fit, X_stop, y_fit, y_stop = train_test_split(
+                X_train, y_train, test_size=early_stopping_fraction, stratify=stratify,
+                random_state=self.random_state,
+            )
+            model.set_params(**{f'{prefix}early_stopping_rounds': early_stopping_rounds})
+            model.fit(X_fit, y_fit, **{f'{prefix}eval_set': [(X_stop, y_stop)], f'{prefix}verbose': False})
+            booster = model[-1] if self.sampler is not None else model
+            return model, booster.best_iteration + 1
+        model.fit(X_train, y_train)
+        return model, params.get(f'{prefix}n_estimators')
+
+    def train_with_halving(self, X_train, y_train, cv=3, scoring='f1', factor=3, min_resources=None,
+                           max_fits=None, time_budget=None, early_stopping_rounds=20, early_stopping_fraction=0.2):
+        """
+        Successive-halving search over get_param_grid().
+
+        max_fits / time_budget (seconds) cap the search; when either runs out the
+        best candidate of the last completed rung is refit on all of X_train.
+        early_stopping_fraction: share of each training fold XGB early-stops on.
+        """
+        candidates = list(ParameterGrid(self.get_param_grid()))
+        np.random.default_rng(self.random_state).shuffle(candidates)
+        n_samples = len(y_train)
+        n_rungs = max(1, math.ceil(math.log(len(candidates), factor)))
+        min_resources = min_resources or max(n_samples // factor ** (n_rungs - 1), 20 * cv)
+        scorer = get_scorer(scoring)
+        y_train = pd.Series(np.asarray(y_train))
+
+        start, fits, trace = time.perf_counter(), 0, []
+        best = None  # (score, params, boosting rounds) of the last completed rung
+        for rung in range(n_rungs):
+            n_resources = n_samples if rung == n_rungs - 1 else min(n_samples, min_resources * factor ** rung)
+            indices = np.arange(n_samples)
+            if n_resources < n_samples:
+                indices = resample(indices, n_samples=n_resources, replace=False, stratify=y_train,
+                                   random_state=self.random_state + rung)
+            X_rung = X_train[indices] if not hasattr(X_train, 'iloc') else X_train.iloc[indices]
+            y_rung = y_train.iloc[indices]
+            folds = list(StratifiedKFold(cv, shuffle=True, random_state=self.random_state).split(indices, y_rung))
+
+            results = []
+            for params in candidates:
+                if (max_fits is not None and fits + cv > max_fits) or \
+                        (time_budget is not None and time.perf_counter() - start > time_budget):
+                    break
+                fit_start = time.perf_counter()
+                scores, rounds = [], []
+                for train_idx, val_idx in folds:
+                    X_tr, X_val = (X_rung.iloc[train_idx], X_rung.iloc[val_idx]) if hasattr(X_rung, 'iloc') \
+                        else (X_rung[train_idx], X_rung[val_idx])
+                    model, n_rounds = self._fit_candidate(
+                        params, X_tr, y_rung.iloc[train_idx], early_stopping_rounds, early_stopping_fraction
+                    )
+                    scores.append(scorer(model, X_val, y_rung.iloc[val_idx]))
+                    rounds.append(n_rounds)
+                fits += cv
+                n_rounds = int(np.median(rounds)) if rounds[0] is not None else None
+                results.append((float(np.mean(scores)), params, n_rounds))
+                trace.append({
+                    'rung': rung, 'n_resources': n_resources, 'params': params,
+                    'mean_score': float(np.mean(scores)), 'std_score': float(np.std(scores)),
+                    'n_estimators_used': n_rounds, 'fit_seconds': time.perf_counter() - fit_start,
+                    'elapsed_seconds': time.perf_counter() - start,
+                })
+
+            if len(results) < len(candidates):
+                if self.verbose:
+                    print(f"Search budget exhausted in rung {rung} after {fits} fits")
+                if results and best is None:
+                    best = max(results, key=lambda r: r[0])
+                break
+            results.sort(key=lambda r: r[0], reverse=True)
+            best = results[0]
+            if self.verbose:
+                print(f"Rung {rung}: {len(candidates)} candidates on {n_resources} rows, "
+                      f"best {scoring} = {best[0]:.4f} ({fits} fits, {time.perf_counter() - start:.1f}s)")
+            candidates = [params for _, params, _ in results[:max(1, math.ceil(len(results) / factor))]]
+
+        if best is None:
+            raise ValueError("Search budget too small to evaluate a single candidate.")
+        score, self.best_params, n_rounds = best
+        self.best_params = dict(self.best_params)
+        if self.model_type == 'xgb' and n_rounds is not None:
+            self.best_params['model__n_estimators' if self.sampler is not None else 'n_estimators'] = n_rounds
+        self.model = clone(self.get_model()).set_params(**self.best_params).fit(X_train, y_train)
+        self.search_trace_ = pd.DataFrame(trace)
+        self._track_search('halving', scoring, self.search_trace_['mean_score'], score,
+                           time.perf_counter() - start, n_samples)
+
+        if self.verbose:
+            print(f"Best Params for {self.model_type.upper()}: {self.best_params} "
+                  f"({scoring} = {score:.4f}, {fits} fits in {time.perf_counter() - start:.1f}s)")
+
+        return self.model
+
+    def train_external_memory(self, paths, target_col='SLA Breach', params=None, num_boost_round=None,
+                              batch_size=100_000, categories=None):
+        """
+        Train an XGB booster from Parquet feature files without loading them at once.
+
+        params defaults to best_params (e.g. from a search on a sample); its
+        n_estimators becomes num_boost_round. Returns an xgboost.Booster, whose
+        predict() gives breach probabilities for an xgboost.DMatrix.
+        """
+        if self.model_type != 'xgb':
+            raise ValueError("External-memory training is only supported for model_type='xgb'.")
+        params = dict(params if params is not None else self.best_params)
+        num_boost_round = num_boost_round or params.pop('n_estimators', 100)
+        params.pop('n_estimators', None)
+        params = {'objective': 'binary:logistic', 'eval_metric': 'logloss', 'tree_method': 'hist',
+                  'seed': self.random_state, **params}
+
+        batches = ParquetBatchIter(paths, target_col=target_col, batch_size=batch_size, categories=categories)
+        dtrain = xgb.ExtMemQuantileDMatrix(batches, enable_categorical=self.enable_categorical)
+        self.model = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+
+        if self.verbose:
+            print(f"Trained XGB booster from external memory: {dtrain.num_row()} rows, "
+                  f"{dtrain.num_col()} features, {num_boost_round} rounds")
+        return self.model
+
+    def train(self, X_train, y_train, search='halving', **kwargs):
+        """search: 'halving' (budgeted successive halving) or 'grid' (exhaustive GridSearchCV)."""
+        if search == 'halving':
+            return self.train_with_halving(X_train, y_train, **kwargs)
+        if search == 'grid':
+            return self.train_with_gridsearch(X_train, y_train, **kwargs)
+        raise ValueError(f"Unsupported search: {search}")
@@ -0,0 +1,181 @@
+import json
+import logging
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_DIR = "data/artifacts/registry"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    version       INTEGER PRIMARY KEY AUTOINCREMENT,
+    name          TEXT NOT NULL,
+    model_type    TEXT NOT NULL,
+    format        TEXT NOT NULL,
+    path          TEXT NOT NULL,
+    metric        TEXT NOT NULL,
+    score         REAL,
+    metrics       TEXT,
+    params        TEXT,
+    feature_names TEXT,
+    created_at    TEXT NOT NULL,
+    is_champion   INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class ModelRegistry:
+    """
+    Local model registry: one artifact per candidate plus a SQLite index of
+    metrics, params and feature schema.
+
+    Training Pipelines whose other steps only resample (SMOTE does nothing at
+    inference) are registered as their final estimator. XGBoost models are
+    stored as UBJSON (save_model / load_model, no pickle); anything else is an
+    uncompressed joblib file loaded with mmap_mode='r', so e.g. a forest's node
+    arrays are mapped from disk instead of copied. Exactly one version is the
+    champion; load_champion() is what the scoring path uses.
+    """
+    def __init__(self, registry_dir=DEFAULT_REGISTRY_DIR, verbose=True):
+        self.registry_dir = Path(registry_dir)
+        self.registry_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.registry_dir / "registry.db"
+        self.verbose = verbose
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        record = dict(row)
+        for key in ('metrics', 'params', 'feature_names'):
+            record[key] = json.loads(record[key]) if record[key] else None
+        return record
+
+    # ------------------------------------------------------------ write
+    @staticmethod
+    def inference_model(model):
+        """The estimator that scoring needs: a Pipeline's last step when every other step only resamples."""
+        steps = getattr(model, 'steps', None)
+        if steps and all(step in (None, 'passthrough') or hasattr(step, 'fit_resample') for _, step in steps[:-1]):
+            return steps[-1][1]
+        return model
+
+    def _save_artifact(self, model, stem):
+        xgboost = sys.modules.get('xgboost')  # an XGBClassifier implies xgboost is already imported
+        if xgboost is not None and isinstance(model, xgboost.XGBClassifier):
+            path = self.registry_dir / f"{stem}.ubj"
+            model.save_model(path)
+            return 'xgboost-ubj', path
+        path = self.registry_dir / f"{stem}.joblib"
+        joblib.dump(model, path)  # uncompressed so numpy arrays can be memory-mapped on load
+        return 'joblib', path
+
+    def register(self, model, metrics: dict, metric='roc_auc', name='sla_breach', params=None,
+                 feature_names=None, promote='if_better') -> int:
+        """
+        Store a candidate and return its version.
+
+        promote: 'if_better' makes it champion when its `metric` beats the current
+        champion's, True always promotes, False never does.
+        """
+        score = metrics.get(metric)
+        champion = self.champion(name)
+        feature_names = feature_names if feature_names is not None else _feature_names(model)
+        params = params if params is not None else _params(model)
+        model = self.inference_model(model)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO models (name, model_type, format, path, metric, score, metrics, params, "
+                "feature_names, created_at) VALUES (?, ?, '', '', ?, ?, ?, ?, ?, ?)",
+                (name, type(model).__name__, metric, score,
+                 json.dumps({k: float(v) for k, v in metrics.items()}),
+                 json.dumps(params, default=str),
+                 json.dumps(list(map(str, feature_names)) if feature_names is not None else None),
+                 datetime.now(timezone.utc).isoformat())
+            )
+            version = cursor.lastrowid
+            fmt, path = self._save_artifact(model, f"{name}-v{version}")
+            conn.execute("UPDATE models SET format = ?, path = ? WHERE version = ?", (fmt, str(path), version))
+
+        better = champion is None or (score is not None and (champion['score'] is None or score > champion['score']))
+        promoted = promote is True or (promote == 'if_better' and better)
+        if promoted:
+            self.promote(version)
+        if self.verbose:
+            print(f"Registered {name} v{version} ({fmt}, {metric} = {score}){' as champion' if promoted else ''}")
+        return version
+
+    def promote(self, version: int):
+        with self._connect() as conn:
+            row = conn.execute("SELECT name FROM models WHERE version = ?", (version,)).fetchone()
+            if row is None:
+                raise KeyError(f"No registered model version {version}")
+            conn.execute("UPDATE models SET is_champion = 0 WHERE name = ?", (row['name'],))
+            conn.execute("UPDATE models SET is_champion = 1 WHERE version = ?", (version,))
+        logger.info(f"Promoted model version {version} to champion")
+
+    # ------------------------------------------------------------- read
+    def get(self, version: int) -> dict:
+        with self._connect() as conn:
+            record = self._row(conn.execute("SELECT * FROM models WHERE version = ?", (version,)).fetchone())
+        if record is None:
+            raise KeyError(f"No registered model version {version}")
+        return record
+
+    def champion(self, name='sla_breach') -> dict:
+        with self._connect() as conn:
+            return self._row(conn.execute(
+                "SELECT * FROM models WHERE name = ? AND is_champion = 1", (name,)
+            ).fetchone())
+
+    def list(self, name=None) -> pd.DataFrame:
+        query, args = "SELECT * FROM models", ()
+        if name is not None:
+            query, args = query + " WHERE name = ?", (name,)
+        with self._connect() as conn:
+            return pd.read_sql_query(query + " ORDER BY version", conn, params=args)
+
+    @staticmethod
+    def _load_artifact(record):
+        if record['format'] == 'xgboost-ubj':
+            from xgboost import XGBClassifier
+
+            model = XGBClassifier()
+            model.load_model(record['path'])
+            return model
+        return joblib.load(record['path'], mmap_mode='r')
+
+    def load(self, version: int):
+        return self._load_artifact(self.get(version))
+
+    def load_champion(self, name='sla_breach'):
+        """(model, metadata) of the current champion."""
+        record = self.champion(name)
+        if record is None:
+            raise LookupError(f"No champion registered for '{name}' in {self.registry_dir}")
+        return self._load_artifact(record), record
+
+
+def _params(model):
+    try:
+        return {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))}
+    except AttributeError:
+        return {}
+
+
+def _feature_names(model):
+    names = getattr(model, 'feature_names_in_', None)
+    return [str(name) for name in names] if names is not None else None
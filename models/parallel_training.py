@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+from models.Modeltraining_sla_breach import ModelTrainer
+
+DEFAULT_MEMMAP_DIR = "data/cache/shared_features"
+
+
+def _fit_and_score(model_type, params, X_path, y_path, columns, train_idx, val_idx, n_threads, scoring,
+                   random_state):
+    """Worker: fit one configuration on one fold of the memory-mapped training set."""
+    start = time.perf_counter()
+    # the arrays are mapped read-only from the shared file; only the fold rows get copied
+    X = pd.DataFrame(np.load(X_path, mmap_mode='r'), columns=columns, copy=False)
+    y = np.load(y_path, mmap_mode='r')
+    with threadpool_limits(n_threads):
+        model = ModelTrainer(model_type, random_state=random_state, verbose=False).get_model()
+        model.set_params(**params, n_jobs=n_threads)
+        model.fit(X.iloc[train_idx], y[train_idx])
+        score = get_scorer(scoring)(model, X.iloc[val_idx], y[val_idx])
+    return score, time.perf_counter() - start
+
+
+class ParallelModelTrainer:
+    """
+    Cross-validates several model families and configurations concurrently
+    against a single copy of the training data.
+
+    X and y are written once to .npy files and every worker maps them read-only
+    (np.load mmap_mode='r'), so workers receive file paths instead of a pickled
+    copy of X_train. Each (configuration, fold) pair is one task. The cores are
+    split between joblib workers and the models' own threads (RF / XGB n_jobs,
+    plus BLAS/OpenMP via threadpoolctl): `workers * threads <= n_cores`, so
+    XGBoost's thread pool and the process pool do not oversubscribe the machine.
+    """
+    def __init__(self, model_types=('rf', 'xgb'), cv=3, scoring='f1', n_cores=None, n_workers=None,
+                 memmap_dir=DEFAULT_MEMMAP_DIR, random_state=42, verbose=True):
+        self.model_types = model_types
+        self.cv = cv
+        self.scoring = scoring
+        self.n_cores = n_cores or os.cpu_count()
+        self.n_workers = n_workers
+        self.memmap_dir = memmap_dir
+        self.random_state = random_state
+        self.verbose = verbose
+        self.results_ = pd.DataFrame()
+        self.best_model_ = None
+        self.best_params_ = {}
+        self.best_model_type_ = None
+
+    def plan_threads(self, n_tasks):
+        """(joblib workers, threads per model) for `n_tasks` independent fits."""
+        workers = max(1, min(n_tasks, self.n_workers or self.n_cores, self.n_cores))
+        return workers, max(1, self.n_cores // workers)
+
+    def _share(self, X, y, directory):
+        if sp.issparse(X):
+            raise ValueError("ParallelModelTrainer needs a dense feature matrix.")
+        X_path, y_path = os.path.join(directory, 'X.npy'), os.path.join(directory, 'y.npy')
+        np.save(X_path, np.ascontiguousarray(np.asarray(X, dtype='float32')))
+        np.save(y_path, np.asarray(y))
+        return X_path, y_path
+
+    def fit(self, X_train, y_train, param_grids=None):
+        """
+        param_grids: optional {model_type: grid}; defaults to ModelTrainer.get_param_grid()
+        for each of `model_types`. The best configuration is refit on all of X_train
+        with every core.
+        """
+        start = time.perf_counter()
+        param_grids = param_grids or {mt: ModelTrainer(mt).get_param_grid() for mt in self.model_types}
+        configs = [(mt, params) for mt, grid in param_grids.items() for params in ParameterGrid(grid)]
+        y_array = np.asarray(y_train)
+        folds = list(StratifiedKFold(self.cv, shuffle=True, random_state=self.random_state)
+                     .split(np.zeros(len(y_array)), y_array))
+        columns = list(X_train.columns) if hasattr(X_train, 'columns') else None
+        workers, threads = self.plan_threads(len(configs) * len(folds))
+        if self.verbose:
+            print(f"Training {len(configs)} configurations x {len(folds)} folds "
+                  f"with {workers} workers x {threads} threads")
+
+        os.makedirs(self.memmap_dir, exist_ok=True)
+        directory = tempfile.mkdtemp(dir=self.memmap_dir)
+        try:
+            X_path, y_path = self._share(X_train, y_array, directory)
+            outputs = Parallel(n_jobs=workers, backend='loky')(
+                delayed(_fit_and_score)(mt, params, X_path, y_path, columns, train_idx, val_idx, threads,
+                                        self.scoring, self.random_state)
+                for mt, params in configs for train_idx, val_idx in folds
+            )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        rows = []
+        for i, (mt, params) in enumerate(configs):
+            scores, seconds = zip(*outputs[i * len(folds):(i + 1) * len(folds)])
+            rows.append({'model_type': mt, 'params': params, 'mean_score': float(np.mean(scores)),
+                         'std_score': float(np.std(scores)), 'fit_seconds': float(np.sum(seconds))})
+        self.results_ = pd.DataFrame(rows).sort_values('mean_score', ascending=False, ignore_index=True)
+
+        best = self.results_.iloc[0]
+        self.best_model_type_, self.best_params_ = best['model_type'], best['params']
+        model = clone(ModelTrainer(self.best_model_type_, random_state=self.random_state, verbose=False).get_model())
+        self.best_model_ = model.set_params(**self.best_params_, n_jobs=self.n_cores).fit(X_train, y_train)
+
+        if self.verbose:
+            print(f"Best: {self.best_model_type_.upper()} {self.best_params_} "
+                  f"({self.scoring} = {best['mean_score']:.4f}); total {time.perf_counter() - start:.1f}s")
+        return self.best_model_
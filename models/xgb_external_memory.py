@@ -0,0 +1,48 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import xgboost as xgb
+
+DEFAULT_CACHE_DIR = "data/cache/xgb_external_memory"
+
+
+class ParquetBatchIter(xgb.DataIter):
+    """
+    Feeds chunked Parquet feature files (features + target column, e.g. the
+    streaming pipeline's output) to XGBoost one record batch at a time, so an
+    ExtMemQuantileDMatrix can be built without loading the whole table.
+
+    `categories` (column -> category list) pins the categories of native
+    categorical columns so every batch uses the same codes.
+    """
+    def __init__(self, paths, target_col='SLA Breach', batch_size=100_000, categories=None,
+                 cache_dir=DEFAULT_CACHE_DIR):
+        self.paths = [paths] if isinstance(paths, (str, Path)) else list(paths)
+        self.target_col = target_col
+        self.batch_size = batch_size
+        self.categories = categories or {}
+        self._batches = None
+        os.makedirs(cache_dir, exist_ok=True)
+        super().__init__(cache_prefix=os.path.join(cache_dir, 'cache'))
+
+    def _iter_batches(self):
+        for path in self.paths:
+            yield from pq.ParquetFile(path).iter_batches(batch_size=self.batch_size)
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = self._iter_batches()
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        df = batch.to_pandas()
+        y = df.pop(self.target_col)
+        for col, categories in self.categories.items():
+            df[col] = pd.Categorical(df[col], categories=categories)
+        input_data(data=df, label=y)
+        return True
+
+    def reset(self):
+        self._batches = None
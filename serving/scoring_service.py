@@ -0,0 +1,256 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+
+from features.frozen_pipeline import FrozenFeaturePipeline
+from models.model_registry import ModelRegistry
+from utils.artifacts import (
+    BEST_MODEL_PATH, DATETIME_FORMATS_PATH, FEATURE_NAMES_PATH, NULL_HANDLER_PATH, VOCABULARY_PATH,
+    load_feature_names,
+)
+
+
+class SLABreachScorer(FrozenFeaturePipeline):
+    """
+    Applies the fitted feature pipeline and model to raw ticket dicts.
+
+    Every artifact is loaded once: the null handler, the datetime formats, the
+    vocabulary store (memory-mapped), the model input columns and the model.
+    score_batch() runs the same DataProcessor -> TimeSeriesProcessor ->
+    FeatureEncoder logic as training (FrozenFeaturePipeline.transform) on one
+    frame per batch, so pandas overhead is paid per batch rather than per ticket.
+
+    That overhead is not removed, only shared: each batch costs a roughly fixed
+    50-70 ms on one core whatever its size (one ticket and 64 tickets take about
+    the same time), so a lone request still waits the full amount. MicroBatcher
+    raises throughput under concurrent load; it does not make single tickets
+    fast, and this path is not suited to latency targets far below that.
+    """
+    def __init__(self, model, null_handler, datetime_formats, vocabularies, feature_names,
+                 target_col='SLA Breach', time_series_options=None, as_of=None):
+        super().__init__(null_handler, datetime_formats, vocabularies, feature_names, target_col,
+                         time_series_options, as_of)
+        self.model = model
+
+    @classmethod
+    def from_artifacts(cls, model_path=BEST_MODEL_PATH, null_handler_path=NULL_HANDLER_PATH,
+                       datetime_formats_path=DATETIME_FORMATS_PATH, vocabulary_path=VOCABULARY_PATH,
+                       feature_names_path=FEATURE_NAMES_PATH, mmap_mode=None, registry_dir=None, **kwargs):
+        """
+        mmap_mode='r' maps the model's arrays from disk instead of copying them (e.g. per worker process).
+        With registry_dir, the registry's champion and its feature schema are used instead of model_path.
+        """
+        if registry_dir is not None:
+            model, record = ModelRegistry(registry_dir, verbose=False).load_champion()
+            feature_names = record['feature_names'] or load_feature_names(feature_names_path)
+        else:
+            model = joblib.load(model_path, mmap_mode=mmap_mode)
+            feature_names = load_feature_names(feature_names_path)
+        features = FrozenFeaturePipeline.from_artifacts(null_handler_path, datetime_formats_path, vocabulary_path,
+                                                        feature_names=feature_names)
+        kwargs.setdefault('time_series_options', features.time_series_options)
+        return cls(model, features.null_handler, features.datetime_formats, features.vocabularies,
+                   features.feature_names, **kwargs)
+
+    def score_batch(self, tickets, as_of=None) -> np.ndarray:
+        """SLA breach probability per ticket."""
+        return self.model.predict_proba(self.transform(tickets, as_of))[:, 1]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submit() calls into batches for `score_batch`.
+
+    A single worker thread takes the first waiting request, then keeps collecting
+    until `max_batch_size` requests are queued or `max_wait_ms` has passed, and
+    scores them together. Per-request latency (submit to result) is kept for the
+    last `latency_window` requests; latency_stats() reports p50/p99.
+    """
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=2.0, latency_window=10_000):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.latencies = deque(maxlen=latency_window)
+        self.batch_sizes = deque(maxlen=latency_window)
+        self._queue = queue.Queue()
+        self._worker = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._worker is None:
+            self._stopped.clear()
+            self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self):
+        if self._worker is not None:
+            self._stopped.set()
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._stopped.set()
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                results = list(self.score_batch([item for item, _, _ in batch]))
+                if len(results) != len(batch):
+                    # results cannot be matched to requests; fail them all rather than leave any waiting
+                    raise RuntimeError(f"score_batch returned {len(results)} results for {len(batch)} requests.")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            for (_, future, submitted), result in zip(batch, results):
+                future.set_result(result)
+                self.latencies.append(done - submitted)
+            self.batch_sizes.append(len(batch))
+
+    def latency_stats(self) -> dict:
+        if not self.latencies:
+            return {'requests': 0}
+        latencies_ms = np.asarray(self.latencies) * 1000
+        return {
+            'requests': len(latencies_ms),
+            'p50_ms': float(np.percentile(latencies_ms, 50)),
+            'p99_ms': float(np.percentile(latencies_ms, 99)),
+            'mean_ms': float(latencies_ms.mean()),
+            'mean_batch_size': float(np.mean(self.batch_sizes)),
+        }
+
+
+class ScoringService:
+    """
+    In-process API: score(ticket) blocks until its micro-batch has been scored,
+    for at most `timeout` seconds. Tickets that are not a dict or carry none
+    of the model's input fields are rejected with ValueError before queuing.
+    """
+    def __init__(self, scorer: SLABreachScorer, threshold=0.5, timeout=30.0, **batcher_options):
+        self.scorer = scorer
+        self.threshold = threshold
+        self.timeout = timeout
+        self.batcher = MicroBatcher(scorer.score_batch, **batcher_options).start()
+
+    def validate(self, ticket):
+        if not isinstance(ticket, dict) or not ticket:
+            raise ValueError("Expected one ticket as a non-empty JSON object.")
+        if not set(ticket) & set(self.scorer.input_columns):
+            raise ValueError(f"Ticket has none of the model's input fields {self.scorer.input_columns}.")
+
+    def score(self, ticket: dict, timeout=None) -> dict:
+        self.validate(ticket)
+        future = self.batcher.submit(ticket)
+        probability = float(future.result(self.timeout if timeout is None else timeout))
+        return {'breach_probability': probability, 'sla_breach': probability >= self.threshold}
+
+    def stats(self) -> dict:
+        return self.batcher.latency_stats()
+
+    def close(self):
+        self.batcher.stop()
+
+
+def _make_handler(service: ScoringService):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._reply(200, service.stats())
+            else:
+                self._reply(404, {'error': f'Unknown path {self.path}'})
+
+        def do_POST(self):
+            if self.path != '/score':
+                self._reply(404, {'error': f'Unknown path {self.path}'})
+                return
+            try:
+                ticket = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except json.JSONDecodeError as e:
+                self._reply(400, {'error': f'Invalid JSON: {e}'})
+                return
+            try:
+                self._reply(200, service.score(ticket))
+            except ValueError as e:
+                self._reply(400, {'error': str(e)})
+            except FutureTimeoutError:
+                self._reply(504, {'error': f'Scoring timed out after {service.timeout}s'})
+            except Exception as e:
+                self._reply(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            pass  # per-request access logs would dominate latency
+
+    return ScoringHandler
+
+
+def serve(service: ScoringService, host='127.0.0.1', port=8080):
+    """POST /score with one ticket JSON; GET /stats for latency percentiles."""
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    print(f"Scoring service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        print(f"Latency: {service.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SLA breach scoring service")
+    parser.add_argument('--model-path', default=BEST_MODEL_PATH)
+    parser.add_argument('--registry', default=None, help="registry directory; serve its champion model")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    scorer = SLABreachScorer.from_artifacts(model_path=args.model_path, registry_dir=args.registry)
+    serve(ScoringService(scorer, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms),
+          host=args.host, port=args.port)
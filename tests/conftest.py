@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture
+def raw_export(tmp_path, monkeypatch):
+    """A small synthetic raw export at RAW_DATA_PATH, with the working directory moved to tmp_path."""
+    from data_ingestion.synthetic_tickets import write_synthetic_csv
+    from Sla_breach_training_pipeline import RAW_DATA_PATH
+
+    monkeypatch.chdir(tmp_path)
+    return write_synthetic_csv(RAW_DATA_PATH, n_rows=2000, seed=7)
@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from Sla_breach_training_pipeline import RAW_DATA_PATH
+from utils.dag_executor import DAGExecutor
+
+SUMMARY_PATH = "data/artifacts/summary.json"
+
+
+def save_summary(df: pd.DataFrame, summary_save_path=SUMMARY_PATH):
+    """Writes its own default path, as select_best_model does with BEST_MODEL_PATH."""
+    Path(summary_save_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_save_path, 'w') as f:
+        json.dump({'rows': len(df)}, f)
+    return len(df)
+
+
+def _executor():
+    return DAGExecutor({
+        'raw': {'call': 'Sla_breach_training_pipeline:load_raw_data', 'params': {'path': RAW_DATA_PATH}},
+        'null_handling': {'call': 'Sla_breach_training_pipeline:run_null_handling', 'inputs': ['raw'],
+                          'artifacts': ['data/artifacts/null_handler.joblib']},
+        'summary': {'call': f'{__name__}:save_summary', 'inputs': ['null_handling'],
+                    'artifacts': [SUMMARY_PATH]},
+    }, checkpoint_dir='data/processed/dag', max_workers=1, verbose=False)
+
+
+def _statuses(executor):
+    return {name: record['status'] for name, record in executor.records_.items()}
+
+
+def test_second_run_without_changes_resumes_every_stage(raw_export):
+    first = _executor()
+    first.run()
+    assert set(_statuses(first).values()) == {'ran'}
+
+    second = _executor()
+    second.run()
+    assert _statuses(second) == {'raw': 'resumed', 'null_handling': 'resumed', 'summary': 'resumed'}
+
+
+def test_changed_source_file_reruns_downstream_stages(raw_export):
+    _executor().run()
+    df = pd.read_csv(raw_export)
+    df.iloc[:len(df) // 2].to_csv(raw_export, index=False)
+
+    executor = _executor()
+    executor.run()
+    assert set(_statuses(executor).values()) == {'ran'}
+    with open(SUMMARY_PATH) as f:
+        assert json.load(f) == {'rows': len(df) // 2}
@@ -0,0 +1,13 @@
+import os
+
+from benchmarks.import_budget import check_import_budgets
+
+# multiply every budget on slow machines, e.g. IMPORT_BUDGET_SCALE=2 on shared CI runners
+SCALE = float(os.environ.get('IMPORT_BUDGET_SCALE', '1.0'))
+
+
+def test_entry_points_import_within_budget():
+    # every module is imported in a fresh interpreter, so nothing this process loaded counts
+    report = check_import_budgets(repeats=3, scale=SCALE)
+    over = report[~report['ok']]
+    assert over.empty, "\n" + over.to_string(index=False)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from Sla_breach_training_pipeline import full_feature_pipeline, streaming_feature_pipeline
+
+AS_OF = '2025-06-01'
+# the streaming pipeline encodes these as epoch seconds instead of label codes (see its docstring)
+DATETIME_COLUMNS = ['created_date', 'first_response_date', 'last_updated_date', 'due_date',
+                    'escalated_date', 'resolved_date', 'closed_date']
+
+
+def test_streamed_features_match_in_memory_pipeline(raw_export):
+    X, _ = full_feature_pipeline(as_of=AS_OF)
+    streamed = pd.read_parquet(streaming_feature_pipeline('streamed.parquet', chunksize=700, as_of=AS_OF))
+    y = streamed.pop('SLA Breach')
+
+    assert list(streamed.columns) == list(X.columns)
+    assert {'ticket_age_hours', 'ticket_age_days'} <= set(streamed.columns)
+
+    # SMOTE appends synthetic rows after the original ones
+    expected = X.iloc[:len(streamed)].reset_index(drop=True)
+    assert len(streamed) == len(pd.read_csv(raw_export))
+    for col in streamed.columns:
+        actual, wanted = streamed[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float)
+        if col in DATETIME_COLUMNS:
+            # different codes, same ordering
+            actual = pd.Series(actual).rank(method='dense').to_numpy()
+            wanted = pd.Series(wanted).rank(method='dense').to_numpy()
+        np.testing.assert_allclose(actual, wanted, rtol=1e-5, equal_nan=True, err_msg=col)
+    assert y.sum() > 0
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+# Fitted artifacts written by the training pipeline and reused by the scoring path
+ARTIFACTS_DIR = "data/artifacts"
+DATETIME_FORMATS_PATH = f"{ARTIFACTS_DIR}/datetime_formats.json"
+NULL_HANDLER_PATH = f"{ARTIFACTS_DIR}/null_handler.joblib"
+VOCABULARY_PATH = f"{ARTIFACTS_DIR}/vocabularies"
+FEATURE_NAMES_PATH = f"{ARTIFACTS_DIR}/feature_names.json"
+TIME_SERIES_OPTIONS_PATH = f"{ARTIFACTS_DIR}/time_series_options.json"
+BEST_MODEL_PATH = f"{ARTIFACTS_DIR}/best_model.joblib"
+CANDIDATE_MODEL_PATH = f"{ARTIFACTS_DIR}/candidate_model.joblib"
+
+
+def save_feature_names(feature_names, path=FEATURE_NAMES_PATH):
+    """Persist the model's input columns, in training order."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump([str(name) for name in feature_names], f, indent=2)
+
+
+def load_feature_names(path=FEATURE_NAMES_PATH) -> list:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_time_series_options(options: dict, path=TIME_SERIES_OPTIONS_PATH):
+    """Persist the business calendar (holidays, region_col, weekmask, business_hours) features were built with."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(options, f, indent=2)
+
+
+def load_time_series_options(path=TIME_SERIES_OPTIONS_PATH) -> dict:
+    """The saved calendar; {} (the default calendar) for artifacts written before it was saved."""
+    if not Path(path).exists():
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
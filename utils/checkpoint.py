@@ -0,0 +1,144 @@
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import scipy.sparse as sp
+
+from utils.sparse_frame import SparseFeatureFrame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = "data/processed/checkpoints"
+
+# Stage names in pipeline order
+PIPELINE_STAGES = ['null_handling', 'memory_optimization', 'time_series', 'encoding', 'leak_removal']
+
+_TARGET_KEY = b'checkpoint_target'
+
+
+class CheckpointStore:
+    """
+    Lossless binary checkpoints (Arrow IPC / Feather) for pipeline stage outputs.
+
+    A stage output is either a DataFrame or an (X, y) tuple; tuples are stored
+    as one table with y appended and its name recorded in the schema metadata.
+    Pandas dtypes (category, nullable ints, datetimes) survive the round-trip.
+    Sparse outputs (a SparseFeatureFrame, or an (X, y) tuple with a CSR X) are
+    stored as .npz archives of the CSR arrays instead.
+    """
+    def __init__(self, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, compression='lz4', verbose=True):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.compression = compression
+        self.verbose = verbose
+
+    def path(self, stage: str) -> Path:
+        """Path of the stage's checkpoint: the sparse archive if one exists, else the Feather file."""
+        sparse_path = self.checkpoint_dir / f"{stage}.npz"
+        return sparse_path if sparse_path.exists() else self.checkpoint_dir / f"{stage}.feather"
+
+    def exists(self, stage: str) -> bool:
+        return self.path(stage).exists()
+
+    def _save_sparse(self, stage: str, output) -> Path:
+        if isinstance(output, SparseFeatureFrame):
+            kind, matrix, columns, index, y = 'frame', output.matrix, output.columns, output.index, output.target
+        else:
+            X, y = output
+            kind, matrix, columns, index = 'xy', sp.csr_matrix(X), None, None
+        arrays = {
+            'kind': np.array(kind), 'data': matrix.data, 'indices': matrix.indices,
+            'indptr': matrix.indptr, 'shape': np.array(matrix.shape),
+        }
+        if columns is not None:
+            arrays['columns'] = np.asarray(columns, dtype=str)
+            arrays['index'] = np.asarray(index)
+        if y is not None:
+            arrays['target'] = np.asarray(y)
+            arrays['target_name'] = np.array(str(getattr(y, 'name', None) or 'target'))
+
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = self.checkpoint_dir / f"{stage}.npz"
+        tmp_path = self.checkpoint_dir / f"{stage}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        feather_path = self.checkpoint_dir / f"{stage}.feather"
+        if feather_path.exists():
+            feather_path.unlink()
+        if self.verbose:
+            print(f" Checkpoint saved: {stage} -> {path} {matrix.shape} (sparse)")
+        return path
+
+    def _load_sparse(self, stage: str, path: Path):
+        with np.load(path, allow_pickle=False) as archive:
+            matrix = sp.csr_matrix(
+                (archive['data'], archive['indices'], archive['indptr']), shape=tuple(archive['shape'])
+            )
+            y = None
+            if 'target' in archive:
+                y = pd.Series(archive['target'], name=str(archive['target_name']))
+            if self.verbose:
+                print(f" Checkpoint loaded: {stage} <- {path} {matrix.shape} (sparse)")
+            if str(archive['kind']) == 'xy':
+                return matrix, y
+            index = pd.Index(archive['index'])
+            if y is not None:
+                y.index = index
+            return SparseFeatureFrame(matrix, archive['columns'].tolist(), index, y)
+
+    def save(self, stage: str, output) -> Path:
+        if isinstance(output, SparseFeatureFrame) or (isinstance(output, tuple) and sp.issparse(output[0])):
+            return self._save_sparse(stage, output)
+        sparse_path = self.checkpoint_dir / f"{stage}.npz"
+        if sparse_path.exists():
+            sparse_path.unlink()
+
+        if isinstance(output, tuple):
+            X, y = output
+            y = pd.Series(y, name=y.name if getattr(y, 'name', None) is not None else 'target')
+            if y.name in X.columns:
+                raise ValueError(f"Target name '{y.name}' clashes with a feature column.")
+            df = X.assign(**{y.name: y.to_numpy()})
+            target = y.name
+        else:
+            df, target = output, None
+
+        table = pa.Table.from_pandas(df)
+        if target is not None:
+            metadata = dict(table.schema.metadata or {})
+            metadata[_TARGET_KEY] = str(target).encode('utf-8')
+            table = table.replace_schema_metadata(metadata)
+
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path(stage)
+        tmp_path = path.with_suffix('.feather.tmp')
+        feather.write_feather(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+        if self.verbose:
+            print(f" Checkpoint saved: {stage} -> {path} {df.shape}")
+        return path
+
+    def load(self, stage: str):
+        path = self.path(stage)
+        if not path.exists():
+            raise FileNotFoundError(f"No checkpoint for stage '{stage}' at {path}")
+        if path.suffix == '.npz':
+            return self._load_sparse(stage, path)
+        table = feather.read_table(path, memory_map=True)
+        target = (table.schema.metadata or {}).get(_TARGET_KEY)
+        df = table.to_pandas()
+        if self.verbose:
+            print(f" Checkpoint loaded: {stage} <- {path} {df.shape}")
+        if target is None:
+            return df
+        target = target.decode('utf-8')
+        return df.drop(columns=[target]), df[target]
+
+    def clear(self, stage: str = None):
+        stages = [stage] if stage else PIPELINE_STAGES
+        for name in stages:
+            if self.exists(name):
+                self.path(name).unlink()
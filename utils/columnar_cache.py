@@ -0,0 +1,105 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from utils.datetime_formats import DATETIME_FORMATS_ATTR, infer_datetime_format
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "data/cache/columnar"
+
+
+class ColumnarCache:
+    """
+    Typed Parquet cache for raw CSV exports.
+
+    The first load of a CSV parses it once, resolves datetime and categorical
+    dtypes and writes the result to Parquet. Later loads of the same file
+    (same path, mtime and size) read the Parquet file memory-mapped instead.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, categorical_threshold=0.5,
+                 datetime_sample_size=100, verbose=True):
+        self.cache_dir = Path(cache_dir)
+        self.categorical_threshold = categorical_threshold
+        self.datetime_sample_size = datetime_sample_size
+        self.verbose = verbose
+
+    def _source_id(self, file_path) -> str:
+        source = str(Path(file_path).resolve())
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+    def cache_key(self, file_path) -> str:
+        """Key of the current state of the source file: path + mtime + size."""
+        stat = os.stat(file_path)
+        state = f"{Path(file_path).resolve()}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(state.encode("utf-8")).hexdigest()[:16]
+
+    def cache_path(self, file_path) -> Path:
+        stem = Path(file_path).stem
+        return self.cache_dir / f"{stem}-{self._source_id(file_path)}-{self.cache_key(file_path)}.parquet"
+
+    def resolve_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert object columns to datetime64 (parsed with an inferred format,
+        recorded in df.attrs) or category where possible.
+        """
+        formats = {}
+        for col in df.columns:
+            if df[col].dtype != "object":
+                continue
+            if df[col].dropna().empty:
+                continue
+            try:
+                fmt = infer_datetime_format(df[col], self.datetime_sample_size)
+                df[col] = pd.to_datetime(df[col], format=fmt, errors="coerce")
+                formats[col] = fmt
+                continue
+            except (ValueError, TypeError, OverflowError):
+                pass
+            if df[col].nunique() <= self.categorical_threshold * len(df):
+                df[col] = df[col].astype("category")
+        df.attrs[DATETIME_FORMATS_ATTR] = formats
+        return df
+
+    def invalidate(self, file_path):
+        """Remove every cached version of the given source file."""
+        for path in self.cache_dir.glob(f"*-{self._source_id(file_path)}-*.parquet"):
+            path.unlink()
+
+    def read_csv(self, file_path, **read_csv_kwargs) -> pd.DataFrame:
+        if not PYARROW_AVAILABLE:
+            logger.warning("pyarrow is not installed; reading '%s' without the columnar cache.", file_path)
+            return self.resolve_dtypes(pd.read_csv(file_path, **read_csv_kwargs))
+
+        cache_path = self.cache_path(file_path)
+        if cache_path.exists():
+            df = pd.read_parquet(cache_path, engine="pyarrow", memory_map=True)
+            if self.verbose:
+                print(f"Loaded cached columns from: {cache_path}")
+            return df
+
+        df = self.resolve_dtypes(pd.read_csv(file_path, **read_csv_kwargs))
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.invalidate(file_path)
+        tmp_path = cache_path.with_suffix(".parquet.tmp")
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, cache_path)
+        if self.verbose:
+            print(f"Wrote columnar cache: {cache_path}")
+        return df
+
+
+def read_csv_cached(file_path, cache_dir=None, **read_csv_kwargs) -> pd.DataFrame:
+    """Read a CSV through a ColumnarCache rooted at `cache_dir`."""
+    cache = ColumnarCache(cache_dir or DEFAULT_CACHE_DIR)
+    return cache.read_csv(file_path, **read_csv_kwargs)
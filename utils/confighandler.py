@@ -3,7 +3,6 @@ from pathlib import Path
 import logging
 import configparser
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ConfigReader:
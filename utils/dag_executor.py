@@ -0,0 +1,393 @@
+import dis
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import scipy.sparse as sp
+
+from utils.checkpoint import CheckpointStore
+from utils.sparse_frame import SparseFeatureFrame
+from utils.stage_cache import code_version, restore_artifacts, snapshot_artifacts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DAG_DIR = "data/processed/dag"
+CONFIG_PATH = "config/config.yaml"
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# params naming a file the stage writes (e.g. select_best_model's model_save_path), not one it reads
+OUTPUT_PARAM_SUFFIXES = ('save_path', 'output_path')
+
+
+def resolve_callable(path: str):
+    """'package.module:function' -> the function."""
+    module, _, name = path.partition(':')
+    if not name:
+        raise ValueError(f"Stage call '{path}' must look like 'module:function'.")
+    return getattr(importlib.import_module(module), name)
+
+
+def _is_repo_code(obj):
+    module = inspect.getmodule(obj)
+    path = getattr(module, '__file__', None)
+    return (inspect.isclass(obj) or inspect.isfunction(obj)) and path is not None \
+        and Path(path).resolve().is_relative_to(REPO_ROOT)
+
+
+def referenced_code(func):
+    """
+    Repository classes / functions `func` uses directly: module-level names it
+    references and names it imports inside its body (the lazy imports of the
+    pipeline stages). The DAG counterpart of the training pipeline's stage_code().
+    """
+    found = {}
+    codes = [func.__code__]
+    while codes:
+        code = codes.pop()
+        codes.extend(const for const in code.co_consts if inspect.iscode(const))
+        module = None
+        for ins in dis.get_instructions(code):
+            if ins.opname == 'IMPORT_NAME':
+                module = importlib.import_module(ins.argval)
+                continue
+            if ins.opname == 'IMPORT_FROM' and module is not None:
+                obj = getattr(module, ins.argval, None)
+            elif ins.opname in ('LOAD_GLOBAL', 'LOAD_NAME'):
+                obj = func.__globals__.get(ins.argval)
+            else:
+                continue
+            if obj is not func and _is_repo_code(obj):
+                found[f"{obj.__module__}.{obj.__qualname__}"] = obj
+    return [found[name] for name in sorted(found)]
+
+
+def file_state(path) -> dict:
+    """mtime, size and content hash of a source file a stage reads."""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': digest.hexdigest()}
+
+
+def _is_checkpointable(obj):
+    """Frames (and (X, y) pairs of them) go to Feather/npz checkpoints; anything else is pickled."""
+    if isinstance(obj, (pd.DataFrame, SparseFeatureFrame)):
+        return True
+    return (isinstance(obj, tuple) and len(obj) == 2 and isinstance(obj[1], pd.Series)
+            and (isinstance(obj[0], pd.DataFrame) or sp.issparse(obj[0])))
+
+
+class DAGExecutor:
+    """
+    Runs pipeline stages declared as a DAG.
+
+    Each stage is {'call': 'module:function', 'inputs': [output names],
+    'outputs': [output names], 'params': {...}}; the function receives its inputs
+    positionally and params as keywords, and a tuple return is split across
+    several outputs (one output defaults to the stage's name). Stages whose
+    inputs are ready run concurrently on a thread pool, so independent
+    branches (e.g. one training stage per model family) overlap.
+
+    Every output is persisted as soon as its stage finishes (frames through
+    CheckpointStore, other objects with joblib), and state.json records each
+    completed stage with a fingerprint of its call, params, code (the stage
+    function and the repository classes / functions it uses), the state of any
+    file it reads (a string param or default naming an existing file that is
+    not one of its artifacts or output paths) and upstream fingerprints. A
+    re-run skips stages whose fingerprint is unchanged, loading only the
+    outputs the remaining stages need, so after a failure it resumes
+    where it stopped. Files a stage writes as a side effect are listed under
+    `artifacts`; they are snapshotted next to its outputs and restored when
+    the stage is resumed. summary() gives per-stage timings and the critical path.
+    """
+    def __init__(self, stages: dict, checkpoint_dir=DEFAULT_DAG_DIR, max_workers=None, verbose=True):
+        self.stages = {name: self._normalize(name, spec) for name, spec in stages.items()}
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.max_workers = max_workers or os.cpu_count()
+        self.verbose = verbose
+        self.store = CheckpointStore(self.checkpoint_dir, verbose=False)
+        self.producers = {out: name for name, spec in self.stages.items() for out in spec['outputs']}
+        self.order = self._topological_order()
+        self.records_ = {}
+        self.wall_seconds_ = None
+
+    @classmethod
+    def from_config(cls, config_path=CONFIG_PATH, section='pipeline', **overrides):
+        """
+        Build the executor from a config section with `stages` (and optional
+        `checkpoint_dir` / `max_workers`). A stage's `params_from: <section>` merges
+        that top-level section into its params, e.g. the time_series calendar.
+        """
+        from utils.confighandler import ConfigReader
+
+        reader = ConfigReader(Path(config_path))
+        pipeline = reader.get_section(section)
+        if not pipeline.get('stages'):
+            raise ValueError(f"No stages declared under '{section}' in {config_path}")
+        stages = {}
+        for name, spec in pipeline['stages'].items():
+            spec = dict(spec)
+            source = spec.pop('params_from', None)
+            if source is not None:
+                spec['params'] = {**reader.get_section(source), **(spec.get('params') or {})}
+            stages[name] = spec
+        options = {key: pipeline[key] for key in ('checkpoint_dir', 'max_workers') if key in pipeline}
+        return cls(stages, **{**options, **overrides})
+
+    # ------------------------------------------------------------ graph
+    @staticmethod
+    def _normalize(name, spec):
+        if 'call' not in spec:
+            raise ValueError(f"Stage '{name}' has no 'call'.")
+        return {
+            'call': spec['call'],
+            'inputs': list(spec.get('inputs') or []),
+            'outputs': list(spec.get('outputs') or [name]),
+            'params': dict(spec.get('params') or {}),
+            'artifacts': list(spec.get('artifacts') or []),
+        }
+
+    def dependencies(self, name):
+        return sorted({self.producers[i] for i in self.stages[name]['inputs']})
+
+    def _topological_order(self):
+        seen = {}
+        for name, spec in self.stages.items():
+            for out in spec['outputs']:
+                if seen.setdefault(out, name) != name:
+                    raise ValueError(f"Output '{out}' is produced by both '{seen[out]}' and '{name}'.")
+            for i in spec['inputs']:
+                if i not in self.producers:
+                    raise ValueError(f"Stage '{name}' needs '{i}', which no stage produces.")
+
+        order, remaining = [], {name: set(self.dependencies(name)) for name in self.stages}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Pipeline stages form a cycle: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    @staticmethod
+    def source_files(func, params, artifacts=()):
+        """
+        Existing files named by a stage's params or string defaults (e.g. the raw export),
+        except the ones the stage writes itself: its declared `artifacts` and output-path
+        params (`*save_path`, `*output_path`). Those change on every run.
+        """
+        defaults = {key: p.default for key, p in inspect.signature(func).parameters.items()
+                    if p.default is not inspect.Parameter.empty}
+        values = {**defaults, **params}
+        written = [Path(path).resolve() for path in artifacts]
+        return {
+            key: value for key, value in values.items()
+            if isinstance(value, str) and not key.endswith(OUTPUT_PARAM_SUFFIXES) and os.path.isfile(value)
+            and not any(Path(value).resolve().is_relative_to(path) for path in written)
+        }
+
+    def fingerprint(self, name, fingerprints):
+        spec = self.stages[name]
+        func = resolve_callable(spec['call'])
+        payload = {
+            'call': spec['call'], 'params': spec['params'], 'inputs': spec['inputs'],
+            'code': code_version(func, *referenced_code(func)),
+            'files': {key: file_state(path)
+                      for key, path in self.source_files(func, spec['params'], spec['artifacts']).items()},
+            'upstream': {dep: fingerprints[dep] for dep in self.dependencies(name)},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------ persistence
+    @property
+    def state_path(self):
+        return self.checkpoint_dir / "state.json"
+
+    def _load_state(self):
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _output_path(self, output, kind):
+        return self.store.path(output) if kind == 'checkpoint' else self.checkpoint_dir / f"{output}.joblib"
+
+    def save_output(self, output, value):
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        if _is_checkpointable(value):
+            self.store.save(output, value)
+            return 'checkpoint'
+        joblib.dump(value, self.checkpoint_dir / f"{output}.joblib")
+        return 'joblib'
+
+    def load_output(self, output, kind=None):
+        kind = kind or self._load_state().get(self.producers[output], {}).get('kinds', {}).get(output)
+        if kind == 'checkpoint':
+            return self.store.load(output)
+        return joblib.load(self._output_path(output, 'joblib'))
+
+    def artifacts_dir(self, name):
+        return self.checkpoint_dir / f"{name}.artifacts"
+
+    def _completed(self, name, state, fingerprint):
+        record = state.get(name)
+        return (record is not None and record.get('fingerprint') == fingerprint
+                and all(self._output_path(out, kind).exists() for out, kind in record['kinds'].items())
+                and (not self.stages[name]['artifacts'] or self.artifacts_dir(name).exists()))
+
+    # -------------------------------------------------------------- run
+    def _run_stage(self, name, inputs):
+        spec = self.stages[name]
+        start = time.perf_counter()
+        result = resolve_callable(spec['call'])(*inputs, **spec['params'])
+        values = result if len(spec['outputs']) > 1 else (result,)
+        if len(values) != len(spec['outputs']):
+            raise ValueError(f"Stage '{name}' returned {len(values)} values for outputs {spec['outputs']}.")
+        outputs = dict(zip(spec['outputs'], values))
+        kinds = {out: self.save_output(out, value) for out, value in outputs.items()}
+        if spec['artifacts']:
+            snapshot_artifacts(spec['artifacts'], self.artifacts_dir(name))
+        return outputs, kinds, time.perf_counter() - start
+
+    def run(self, targets=None, resume=True, tracker=None):
+        """
+        Run `targets` (default: every stage) and their upstream stages. With
+        resume=False every stage is recomputed. Returns the outputs computed or
+        loaded in this run, by output name.
+        """
+        needed = set()
+        pending = list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'. Expected one of {list(self.stages)}")
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.dependencies(name))
+        order = [name for name in self.order if name in needed]
+
+        state = self._load_state() if resume else {}
+        fingerprints = {}
+        for name in order:
+            fingerprints[name] = self.fingerprint(name, fingerprints)
+        done = set()
+        for name in order:  # a stage is only reusable when everything upstream of it is too
+            if (self._completed(name, state, fingerprints[name]) and done.issuperset(self.dependencies(name))
+                    and restore_artifacts(self.stages[name]['artifacts'], self.artifacts_dir(name))):
+                done.add(name)
+        self.records_ = {name: {'status': 'resumed', 'seconds': 0.0, 'start': None} for name in done}
+        if self.verbose:
+            print(f"\n Running {len(order) - len(done)} of {len(order)} stages "
+                  f"({len(done)} resumed) with up to {self.max_workers} concurrent")
+
+        values = {}
+        # stages that still have to run need their inputs; resumed producers are read from disk
+        to_run = [name for name in order if name not in done]
+        for name in to_run:
+            for i in self.stages[name]['inputs']:
+                if self.producers[i] in done and i not in values:
+                    values[i] = self.load_output(i, state[self.producers[i]]['kinds'][i])
+
+        run_start = time.perf_counter()
+        running, failure = {}, None
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix='dag-stage') as pool:
+            while True:
+                if failure is None:
+                    for name in to_run:
+                        if name in running.values() or name in self.records_:
+                            continue
+                        if all(dep in done for dep in self.dependencies(name)):
+                            inputs = [values[i] for i in self.stages[name]['inputs']]
+                            stage_ctx = tracker.stage(name) if tracker is not None else nullcontext()
+                            running[pool.submit(self._timed, stage_ctx, name, inputs)] = name
+                            self.records_[name] = {'status': 'running', 'start': time.perf_counter() - run_start}
+                            if self.verbose:
+                                print(f" [dag] started {name}")
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outputs, kinds, seconds = future.result()
+                    except Exception as e:
+                        self.records_[name].update(status='failed', seconds=time.perf_counter() - run_start
+                                                   - self.records_[name]['start'])
+                        logger.error(f"Stage '{name}' failed: {e}")
+                        failure = failure or e
+                        continue
+                    values.update(outputs)
+                    done.add(name)
+                    self.records_[name].update(status='ran', seconds=seconds)
+                    state[name] = {'fingerprint': fingerprints[name], 'kinds': kinds, 'seconds': seconds}
+                    self._save_state(state)
+                    if self.verbose:
+                        print(f" [dag] finished {name} in {seconds:.1f}s")
+
+        self.wall_seconds_ = time.perf_counter() - run_start
+        for name in order:
+            self.records_.setdefault(name, {'status': 'not run', 'seconds': 0.0, 'start': None})
+        if self.verbose:
+            self.print_summary()
+        if failure is not None:
+            raise failure
+        return values
+
+    def _timed(self, stage_ctx, name, inputs):
+        with stage_ctx:
+            return self._run_stage(name, inputs)
+
+    # ---------------------------------------------------------- summary
+    def critical_path(self):
+        """Chain of dependent stages with the largest total run time in the last run (resumed stages excluded)."""
+        finish, previous = {}, {}
+        for name in self.order:
+            if self.records_.get(name, {}).get('status') not in ('ran', 'failed'):
+                continue
+            deps = [dep for dep in self.dependencies(name) if dep in finish]
+            best = max(deps, key=finish.get, default=None)
+            finish[name] = self.records_[name]['seconds'] + (finish[best] if best else 0.0)
+            previous[name] = best
+        node, path = max(finish, key=finish.get, default=None), []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return path[::-1]
+
+    def summary(self) -> pd.DataFrame:
+        critical = set(self.critical_path())
+        return pd.DataFrame([
+            {'stage': name, 'status': record['status'], 'seconds': record['seconds'],
+             'started_at': record['start'], 'critical_path': name in critical}
+            for name, record in ((n, self.records_[n]) for n in self.order if n in self.records_)
+        ])
+
+    def print_summary(self):
+        report = self.summary()
+        path = self.critical_path()
+        stage_seconds = report['seconds'].sum()
+        print("\n Stage timings:")
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        print(f" Critical path: {' -> '.join(path) or 'none (every stage resumed)'} "
+              f"({report.loc[report['critical_path'], 'seconds'].sum():.1f}s); "
+              f"wall {self.wall_seconds_:.1f}s for {stage_seconds:.1f}s of stage time")
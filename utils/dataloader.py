@@ -5,16 +5,19 @@ try:
     from utils.confighandler import ConfigReader
 except ImportError as e:
     raise ImportError(f"Failed to import ConfigReader. Ensure 'confighandler.py' is available. Details: {e}")
+from utils.columnar_cache import ColumnarCache, DEFAULT_CACHE_DIR
 
 class DataLoader:
     """
     Loads data based on file paths defined in config.yaml.
     """
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         # Initialize the ConfigReader to read the main config file
         self.config_reader = ConfigReader()
         self.data_paths = {}
+        self.use_cache = use_cache
         self._load_config()
+        self.cache = ColumnarCache(self.data_paths.get("cache_dir", DEFAULT_CACHE_DIR))
 
     def _load_config(self):
         """Load file paths from config under the 'data' section."""
@@ -29,6 +32,8 @@ class DataLoader:
     def load_csv(self, key: str) -> pd.DataFrame:
         """
         Load a CSV file based on a key from the config file's 'data' section.
+        Unless the loader was created with use_cache=False, the file is read
+        through the typed columnar cache and only re-parsed when it changes.
         Parameters:
             key (str): Key defined in the config (e.g., 'raw_data').
         Returns:
@@ -40,35 +45,12 @@ class DataLoader:
                 raise KeyError(f"No path found for key '{key}' in the 'data' section.")
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"The file '{file_path}' does not exist.")
-            df = pd.read_csv(file_path)
+            df = self.cache.read_csv(file_path) if self.use_cache else pd.read_csv(file_path)
             print(f"Loaded data from: {file_path} (rows: {df.shape[0]}, cols: {df.shape[1]})")
             return df
         except Exception as e:
             raise RuntimeError(f"Failed to load data for key '{key}': {e}")
     
-    # datadump
-    def load_csv(self, key: str) -> pd.DataFrame:
-        """
-        Load a CSV file based on a key from the config file's 'data' section.
-        Parameters:
-            key (str): Key defined in the config (e.g., 'raw_data').
-        Returns:
-            pd.DataFrame: Loaded data as a DataFrame.
-        """
-        try:
-            file_path = self.data_paths.get(key)
-            if not file_path:
-                raise KeyError(f"No path found for key '{key}' in the 'data' section.")
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"The file '{file_path}' does not exist.")
-            df = pd.read_csv(file_path)
-            print(f"Loaded data from: {file_path} (rows: {df.shape[0]}, cols: {df.shape[1]})")
-            return df
-        except Exception as e:
-            raise RuntimeError(f"Failed to load data for key '{key}': {e}")
-        
-        
-    
     def load_data_raw(self) -> pd.DataFrame:
         """
         Load the main raw data file.
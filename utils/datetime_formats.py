@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# DataFrame.attrs key under which loaders record the formats of columns they already parsed
+DATETIME_FORMATS_ATTR = 'datetime_formats'
+
+
+def infer_datetime_format(series: pd.Series, sample_size: int = 100):
+    """
+    Guess the strftime format of a string column from its first non-null value
+    and check it against a sample. Returns None when no single format could be
+    guessed but the sample still parses; raises if the sample is not datetime-like.
+    """
+    sample = series.dropna().head(sample_size)
+    if sample.empty:
+        raise ValueError(f"Column '{series.name}' has no values to infer a datetime format from.")
+    fmt = guess_datetime_format(str(sample.iloc[0]))
+    pd.to_datetime(sample, format=fmt, errors='raise')
+    return fmt
+
+
+def save_datetime_formats(formats: dict, path):
+    """Persist the column -> strftime format mapping so inference parses the same way."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(formats, f, indent=2)
+
+
+def load_datetime_formats(path) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
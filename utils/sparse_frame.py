@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class SparseFeatureFrame:
+    """
+    CSR feature matrix with column names: the sparse counterpart of an encoded DataFrame.
+    The target is kept out of the matrix as a Series so it keeps its dtype.
+    """
+    def __init__(self, matrix, columns, index=None, target=None):
+        self.matrix = sp.csr_matrix(matrix)
+        self.columns = pd.Index(columns)
+        self.index = index if index is not None else pd.RangeIndex(self.matrix.shape[0])
+        self.target = target
+        if self.matrix.shape[1] != len(self.columns):
+            raise ValueError(f"Matrix has {self.matrix.shape[1]} columns but {len(self.columns)} names were given.")
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def column(self, name) -> np.ndarray:
+        return self.matrix[:, self.columns.get_loc(name)].toarray().ravel()
+
+    def drop(self, columns):
+        keep = ~self.columns.isin(columns)
+        return SparseFeatureFrame(self.matrix[:, np.flatnonzero(keep)], self.columns[keep], self.index, self.target)
+
+    def memory_usage(self) -> int:
+        return self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes
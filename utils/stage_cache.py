@@ -0,0 +1,174 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.checkpoint import CheckpointStore
+from utils.sparse_frame import SparseFeatureFrame
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGE_CACHE_DIR = "data/cache/stages"
+
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (values, index, column names and dtypes) or a SparseFeatureFrame."""
+    digest = hashlib.sha256()
+    if isinstance(df, SparseFeatureFrame):
+        digest.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+        for array in (df.matrix.data, df.matrix.indices, df.matrix.indptr):
+            digest.update(array.tobytes())
+        if df.target is not None:
+            digest.update(pd.util.hash_pandas_object(df.target, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+    digest.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+    digest.update(json.dumps([str(t) for t in df.dtypes]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def code_version(*objects) -> str:
+    """Hash of the source code of the given functions/classes."""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _copy(src: Path, dst: Path):
+    if dst.is_dir():
+        shutil.rmtree(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def snapshot_artifacts(paths, dest):
+    """Copy the artifact files / directories a stage wrote into `dest`, replacing an older snapshot."""
+    dest = Path(dest)
+    tmp = dest.with_name(dest.name + '.tmp')
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    for i, path in enumerate(paths):
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Stage artifact {path} was not written.")
+        _copy(path, tmp / f"{i}-{path.name}")
+    if dest.exists():
+        shutil.rmtree(dest)
+    os.replace(tmp, dest)
+
+
+def restore_artifacts(paths, src) -> bool:
+    """Put a snapshot's artifacts back at `paths`; False (nothing restored) when the snapshot is incomplete."""
+    sources = [Path(src) / f"{i}-{Path(path).name}" for i, path in enumerate(paths)]
+    if not all(source.exists() for source in sources):
+        return False
+    for source, path in zip(sources, paths):
+        _copy(source, Path(path))
+    return True
+
+
+def _tree_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file()) if path.exists() else 0
+
+
+class StageCache:
+    """
+    Content-addressed on-disk memoization of pipeline stages.
+
+    Entries are keyed by a hash of the input frame, the stage parameters and
+    the stage's code version, and stored as Feather checkpoints. Artifacts a
+    stage writes as a side effect (fitted null handler, vocabularies, ...) are
+    passed as `artifacts`: they are snapshotted with the entry and copied back
+    on a hit, so a hit leaves the same artifacts as a recompute. The least
+    recently used entries are evicted once the cache exceeds `max_bytes`.
+    """
+    def __init__(self, cache_dir=DEFAULT_STAGE_CACHE_DIR, max_bytes=20 * 1024 ** 3, verbose=True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        self.store = CheckpointStore(self.cache_dir, verbose=False)
+
+    def key(self, stage: str, df: pd.DataFrame, params=None, code=()) -> str:
+        payload = {
+            'stage': stage,
+            'input': hash_frame(df),
+            'params': params or {},
+            'code': code_version(*code) if code else None,
+            'pandas': pd.__version__,
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return f"{stage}-{hashlib.sha256(blob).hexdigest()[:24]}"
+
+    def get(self, key: str):
+        path = self.store.path(key)
+        if not path.exists():
+            return None
+        os.utime(path)  # mark as recently used
+        return self.store.load(key)
+
+    def artifacts_dir(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.artifacts"
+
+    def put(self, key: str, output, artifacts=()):
+        self.store.save(key, output)
+        if artifacts:
+            snapshot_artifacts(artifacts, self.artifacts_dir(key))
+        self.evict(keep=key)
+
+    def entries(self):
+        """Cached entries (with their artifact snapshots) as (path, size, last_used), least recently used first."""
+        entries = []
+        for path in [*self.cache_dir.glob('*.feather'), *self.cache_dir.glob('*.npz')]:
+            stat = path.stat()
+            entries.append((path, stat.st_size + _tree_size(self.artifacts_dir(path.stem)), stat.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: str = None):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == self.store.path(keep):
+                continue
+            path.unlink()
+            shutil.rmtree(self.artifacts_dir(path.stem), ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted stage cache entry {path.name} ({size / 1024 ** 2:.1f} MB)")
+        if total > self.max_bytes:
+            logger.warning(f"Stage cache is {total / 1024 ** 2:.1f} MB, above its budget of "
+                           f"{self.max_bytes / 1024 ** 2:.1f} MB, after evicting everything but the newest entry.")
+
+    def run(self, stage: str, func, df: pd.DataFrame, params=None, code=(), artifacts=()):
+        """
+        Return func(df, **params) from the cache, computing and storing it on a
+        miss. `artifacts` are the paths func writes; a hit restores them.
+        """
+        params = params or {}
+        key = self.key(stage, df, params, code)
+        cached = self.get(key)
+        if cached is not None and (not artifacts or restore_artifacts(artifacts, self.artifacts_dir(key))):
+            if self.verbose:
+                print(f" Stage cache hit: {stage} ({key})")
+            return cached
+
+        start = time.perf_counter()
+        output = func(df, **params)
+        if self.verbose:
+            print(f" Stage cache miss: {stage} computed in {time.perf_counter() - start:.1f}s ({key})")
+        self.put(key, output, artifacts)
+        return output
@@ -0,0 +1,172 @@
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # POSIX only; peak RSS is skipped elsewhere
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPERIMENT = "sla_breach_pipeline"
+
+# MLflow log_batch limits per request
+_MAX_PARAMS, _MAX_TAGS, _MAX_METRICS = 100, 100, 800
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux reports KB
+
+
+def current_rss_mb():
+    """Resident set size of this process right now, in MB (None where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+class AsyncRunLogger:
+    """
+    Non-blocking MLflow run logger.
+
+    log_param / log_metric / set_tag only append to an in-memory queue; a
+    background thread drains it every `flush_interval` seconds and sends
+    everything collected with one MlflowClient.log_batch call (split at
+    MLflow's per-request limits), so the pipeline never waits on tracking I/O.
+    close() flushes what is left and ends the run. When mlflow is not
+    installed, or `enabled=False`, every call is a no-op.
+    """
+    def __init__(self, experiment_name=DEFAULT_EXPERIMENT, run_name=None, tags=None, tracking_uri=None,
+                 flush_interval=1.0, enabled=True):
+        self.experiment_name = experiment_name
+        self.run_name = run_name
+        self.tags = dict(tags or {})
+        self.tracking_uri = tracking_uri
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.run_id = None
+        self._client = None
+        self._queue = queue.Queue()
+        self._worker = None
+        self._params = set()
+
+    # ------------------------------------------------------------ lifecycle
+    def start(self):
+        if not self.enabled or self.run_id is not None:
+            return self
+        try:
+            from mlflow.tracking import MlflowClient
+        except ImportError:
+            logger.warning("mlflow is not installed; run tracking is disabled.")
+            self.enabled = False
+            return self
+
+        try:
+            self._client = MlflowClient(tracking_uri=self.tracking_uri)
+            experiment = self._client.get_experiment_by_name(self.experiment_name)
+            experiment_id = (experiment.experiment_id if experiment is not None
+                             else self._client.create_experiment(self.experiment_name))
+            run = self._client.create_run(experiment_id, run_name=self.run_name, tags=self.tags)
+        except Exception as e:  # tracking must never take the pipeline down
+            logger.warning(f"Could not start an MLflow run ({e}); run tracking is disabled.")
+            self.enabled, self._client = False, None
+            return self
+        self.run_id = run.info.run_id
+        self._worker = threading.Thread(target=self._run, name='mlflow-logger', daemon=True)
+        self._worker.start()
+        return self
+
+    def close(self, status='FINISHED'):
+        if self._worker is None:
+            return
+        self._queue.put(None)
+        self._worker.join()
+        self._worker = None
+        try:
+            self._client.set_terminated(self.run_id, status=status)
+        except Exception as e:
+            logger.warning(f"Could not end MLflow run {self.run_id}: {e}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close('FAILED' if exc_type else 'FINISHED')
+
+    # -------------------------------------------------------------- logging
+    def log_param(self, key, value):
+        if self.enabled and key not in self._params:  # MLflow params are write-once
+            self._params.add(key)
+            self._queue.put(('param', key, str(value)[:6000]))
+
+    def log_params(self, params: dict, prefix=''):
+        for key, value in params.items():
+            self.log_param(f"{prefix}{key}", value)
+
+    def log_metric(self, key, value, step=0):
+        if self.enabled and value is not None:
+            self._queue.put(('metric', key, float(value), int(time.time() * 1000), step))
+
+    def log_metrics(self, metrics: dict, step=0, prefix=''):
+        for key, value in metrics.items():
+            self.log_metric(f"{prefix}{key}", value, step)
+
+    def set_tag(self, key, value):
+        if self.enabled:
+            self._queue.put(('tag', key, str(value)))
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Log `stage.<name>.seconds`, `stage.<name>.rss_delta_mb` (resident memory the
+        block added and still holds) and `stage.<name>.process_peak_rss_mb` (the
+        process's peak so far, which includes earlier stages) after the block.
+        """
+        start, rss_before = time.perf_counter(), current_rss_mb()
+        try:
+            yield
+        finally:
+            self.log_metric(f"stage.{name}.seconds", time.perf_counter() - start)
+            rss_after = current_rss_mb()
+            if rss_before is not None and rss_after is not None:
+                self.log_metric(f"stage.{name}.rss_delta_mb", rss_after - rss_before)
+            self.log_metric(f"stage.{name}.process_peak_rss_mb", peak_rss_mb())
+
+    # --------------------------------------------------------- background
+    def _run(self):
+        from mlflow.entities import Metric, Param, RunTag
+
+        stopping = False
+        while not stopping:
+            items = []
+            try:
+                items.append(self._queue.get(timeout=self.flush_interval))
+                while True:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if None in items:
+                stopping = True
+                items = [item for item in items if item is not None]
+
+            params = [Param(key, value) for kind, key, value, *_ in items if kind == 'param']
+            tags = [RunTag(key, value) for kind, key, value, *_ in items if kind == 'tag']
+            metrics = [Metric(key, value, ts, step) for kind, key, value, ts, step in
+                       (item for item in items if item[0] == 'metric')]
+            while params or tags or metrics:
+                try:
+                    self._client.log_batch(self.run_id, metrics=metrics[:_MAX_METRICS],
+                                           params=params[:_MAX_PARAMS], tags=tags[:_MAX_TAGS])
+                except Exception as e:  # tracking must never take the pipeline down
+                    logger.warning(f"MLflow log_batch failed: {e}")
+                params, tags, metrics = params[_MAX_PARAMS:], tags[_MAX_TAGS:], metrics[_MAX_METRICS:]